@@ -1,29 +1,28 @@
 #app/auth/router
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import schemas, service
-from app.db.session import get_db
+from app.db.session import get_async_db
 
-from app.core.security import get_current_user
-from app.db.models import User
+from app.core.security import Principal, get_current_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/signup", response_model=schemas.TokenResponse)
-def signup(user_create: schemas.UserCreate, db: Session = Depends(get_db)):
-    return service.create_user(db, user_create)
+async def signup(user_create: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await service.create_user(db, user_create)
 
 @router.post("/login", response_model=schemas.TokenResponse)
-def login(
+async def login(
     credentials: schemas.UserLogin,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Authenticate user credentials and return JWT tokens.
     """
-    return service.authenticate_user(db, credentials)
+    return await service.authenticate_user(db, credentials)
 
 
 @router.post("/refresh", response_model=schemas.AccessTokenResponse)
@@ -34,7 +33,7 @@ def refresh_token(payload: schemas.RefreshTokenRequest):
     return service.refresh_access_token(payload.refresh_token)
 
 @router.get("/me")
-def read_me(current_user: User = Depends(get_current_user)):
+def read_me(current_user: Principal = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email,
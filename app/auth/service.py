@@ -1,45 +1,63 @@
 # app/auth/service.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
 from app.db.models import User
+from app.core.config import settings
 from app.core.security import (
-    hash_password,
-    verify_password,
+    PasswordHasherBusyError,
+    password_hasher,
     create_access_token,
     create_refresh_token,
+    invalidate_user,
 )
 
 
-def create_user(db: Session, user_signup):
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, retry shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def create_user(db: AsyncSession, user_signup):
     """
     Create a new user and return JWT tokens.
+    The password is hashed on the bounded hashing executor.
     """
-    existing_user = db.query(User).filter(User.email == user_signup.email).first()
+    result = await db.execute(select(User).where(User.email == user_signup.email))
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists",
         )
 
+    try:
+        hashed_password = await password_hasher.hash(user_signup.password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+
     user = User(
         email=user_signup.email,
-        hashed_password=hash_password(user_signup.password),
+        hashed_password=hashed_password,
     )
 
     db.add(user)
     try:
-        db.commit()
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists",
         )
 
-    db.refresh(user)
+    await db.refresh(user)
 
     return {
         "access_token": create_access_token(user.email),
@@ -48,18 +66,36 @@ def create_user(db: Session, user_signup):
     }
 
 
-def authenticate_user(db: Session, user_login):
+async def authenticate_user(db: AsyncSession, user_login):
     """
     Authenticate user and return JWT tokens.
+    Hashes made with an outdated bcrypt cost are transparently
+    upgraded to the configured cost on successful login.
     """
-    user = db.query(User).filter(User.email == user_login.email).first()
-    if not user or not verify_password(
-        user_login.password, user.hashed_password
-    ):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid email or password",
+    invalid_credentials = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid email or password",
+    )
+
+    result = await db.execute(select(User).where(User.email == user_login.email))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise invalid_credentials
+
+    try:
+        verified, new_hash = await password_hasher.verify_and_update(
+            user_login.password, user.hashed_password
         )
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+
+    if not verified:
+        raise invalid_credentials
+
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        invalidate_user(user.id)
 
     return {
         "access_token": create_access_token(user.email),
@@ -0,0 +1,349 @@
+"""
+app/benchmarks/harness.py
+
+In-process load benchmark for the API.
+
+Runs the ASGI app in this process (httpx over ASGITransport, no network)
+against a throwaway SQLite database and upload directory, with a job
+worker thread whose processor is replaced by a fast fake. Virtual users
+run the full lifecycle concurrently:
+
+    signup → login → (upload → process → poll status until done) × N → list
+
+and per-operation throughput and p50/p95/p99 latencies are printed as
+JSON on stdout (logs go to stderr).
+
+    python -m app.benchmarks.harness --users 50 --concurrency 16
+    python -m app.benchmarks.harness --output baseline.json
+    python -m app.benchmarks.harness --check app/benchmarks/thresholds.json
+    python -m app.benchmarks.harness --baseline baseline.json --tolerance 0.25
+
+--check fails (exit code 1) when an operation breaks an absolute limit;
+--baseline fails when a latency percentile regressed by more than
+--tolerance relative to an earlier report.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Percentiles compared against a baseline report
+BASELINE_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+# -------------------------
+# Fake processor
+# -------------------------
+# Replaces the simulated processor stages: deterministic, no random
+# failures, and a configurable per-page delay (set from --page-delay-ms).
+FAKE_PAGE_DELAY_SECONDS = 0.0
+FAKE_PAGES = 3
+
+
+def fake_split_document(file_path: str, filename: str) -> Dict[str, object]:
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found at path: {file_path}")
+    return {"page_count": FAKE_PAGES}
+
+
+def fake_extract_page(file_path: str, filename: str, number: int, page_count: int) -> Dict[str, object]:
+    if FAKE_PAGE_DELAY_SECONDS:
+        time.sleep(FAKE_PAGE_DELAY_SECONDS)
+    return {"number": number, "text": f"{filename} page {number}", "confidence": 0.99}
+
+
+# -------------------------
+# Measurement
+# -------------------------
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, operation: str, request, expected: tuple = (200,)):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.errors[operation] += 1
+            raise
+        self.latencies[operation].append((time.perf_counter() - started) * 1000)
+        if response.status_code not in expected:
+            self.errors[operation] += 1
+            raise RuntimeError(
+                f"{operation}: HTTP {response.status_code} {response.text[:200]}"
+            )
+        return response
+
+    def report(self, wall_seconds: float) -> Dict[str, Dict[str, float]]:
+        operations = {}
+        for operation in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies[operation])
+            count = len(samples)
+            errors = self.errors[operation]
+            operations[operation] = {
+                "count": count,
+                "errors": errors,
+                "error_rate": round(errors / (count or 1), 4),
+                "throughput_rps": round(count / wall_seconds, 2),
+                "p50_ms": _percentile(samples, 50),
+                "p95_ms": _percentile(samples, 95),
+                "p99_ms": _percentile(samples, 99),
+                "max_ms": round(samples[-1], 2) if samples else 0.0,
+            }
+        return operations
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_samples)), 1)
+    return round(sorted_samples[rank - 1], 2)
+
+
+# -------------------------
+# Scenario
+# -------------------------
+async def virtual_user(client, recorder: Recorder, args: argparse.Namespace) -> None:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    password = "benchmark-password"
+
+    await recorder.call(
+        "signup", client.post("/auth/signup", json={"email": email, "password": password})
+    )
+    response = await recorder.call(
+        "login", client.post("/auth/login", json={"email": email, "password": password})
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    for _ in range(args.uploads):
+        content = b"%PDF-1.4\n" + os.urandom(args.file_size)
+        response = await recorder.call(
+            "upload",
+            client.post(
+                "/documents/upload",
+                headers=headers,
+                files={"file": ("bench.pdf", content, "application/pdf")},
+            ),
+            expected=(201,),
+        )
+        document_id = response.json()["id"]
+
+        await recorder.call(
+            "process",
+            client.post(f"/documents/{document_id}/process", headers=headers),
+            expected=(202,),
+        )
+
+        deadline = time.monotonic() + args.poll_timeout
+        while True:
+            response = await recorder.call(
+                "poll",
+                client.get(
+                    f"/documents/{document_id}/status",
+                    headers=headers,
+                    params={"wait": args.poll_wait},
+                ),
+            )
+            if response.json()["status"] in ("COMPLETED", "FAILED"):
+                break
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"document {document_id} not processed in time")
+            if not args.poll_wait:
+                await asyncio.sleep(args.poll_interval)
+
+    for _ in range(args.lists):
+        await recorder.call(
+            "list", client.get("/documents", headers=headers, params={"limit": 50})
+        )
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, object]:
+    # Imported here: settings are read from the environment prepared by main()
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    import httpx
+
+    from app.documents import processor
+    from app.documents.executor import ProcessingExecutor
+    from app.jobs.worker import Worker
+    from app.main import app
+
+    processor.split_document = fake_split_document
+    processor.extract_page = fake_extract_page
+
+    executor = ProcessingExecutor(
+        max_workers=args.processing_threads,
+        pool=ThreadPoolExecutor(max_workers=args.processing_threads),
+    )
+    worker = Worker(concurrency=args.worker_concurrency, poll_interval=0.02, executor=executor)
+    worker_thread = threading.Thread(target=worker.run, name="bench-worker", daemon=True)
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures: List[str] = []
+
+    async def limited(client) -> None:
+        async with semaphore:
+            try:
+                await virtual_user(client, recorder, args)
+            except (httpx.HTTPError, RuntimeError, KeyError, ValueError) as exc:
+                # Transport errors, unexpected statuses or timeouts
+                # (RuntimeError), and malformed response bodies
+                failures.append(f"{type(exc).__name__}: {exc}")
+
+    async with app.router.lifespan_context(app):
+        worker_thread.start()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=args.poll_timeout + 30
+        ) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(limited(client) for _ in range(args.users)))
+            wall_seconds = time.perf_counter() - started
+        worker.stop()
+        await asyncio.to_thread(worker_thread.join)
+
+    operations = recorder.report(wall_seconds)
+    total_requests = sum(op["count"] for op in operations.values())
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "users", "concurrency", "uploads", "lists", "file_size",
+                "poll_wait", "page_delay_ms", "bcrypt_rounds",
+            )
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "requests": total_requests,
+        "throughput_rps": round(total_requests / wall_seconds, 2),
+        "failed_users": len(failures),
+        "failures": failures[:10],
+        "operations": operations,
+    }
+
+
+# -------------------------
+# Regression checks
+# -------------------------
+def check_thresholds(report: Dict[str, object], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    thresholds: {"upload": {"p95_ms": 50, "throughput_rps": 20, "error_rate": 0}}
+    Latency and error_rate are upper bounds, throughput_rps a lower bound.
+    The "*" key applies to every operation.
+    """
+    violations = []
+    operations = report["operations"]
+    for name, limits in thresholds.items():
+        targets = operations.items() if name == "*" else [(name, operations.get(name))]
+        for operation, stats in targets:
+            if stats is None:
+                violations.append(f"{operation}: no samples")
+                continue
+            for metric, limit in limits.items():
+                value = stats[metric]
+                if metric == "throughput_rps" and value < limit:
+                    violations.append(f"{operation}.{metric} = {value} < {limit}")
+                elif metric != "throughput_rps" and value > limit:
+                    violations.append(f"{operation}.{metric} = {value} > {limit}")
+    return violations
+
+
+def compare_baseline(report: Dict[str, object], baseline: Dict[str, object], tolerance: float) -> List[str]:
+    violations = []
+    for operation, before in baseline["operations"].items():
+        after = report["operations"].get(operation)
+        if after is None:
+            continue
+        for metric in BASELINE_METRICS:
+            # Sub-millisecond noise is not a regression
+            allowed = max(before[metric] * (1 + tolerance), before[metric] + 1.0)
+            if after[metric] > allowed:
+                violations.append(
+                    f"{operation}.{metric} = {after[metric]} vs baseline {before[metric]} "
+                    f"(+{tolerance:.0%} allowed)"
+                )
+    return violations
+
+
+# -------------------------
+# Entry point
+# -------------------------
+def main(argv: Optional[list] = None) -> None:
+    global FAKE_PAGE_DELAY_SECONDS
+
+    parser = argparse.ArgumentParser(description="Benchmark the API in-process.")
+    parser.add_argument("--users", type=int, default=20, help="Virtual users in total")
+    parser.add_argument("--concurrency", type=int, default=8, help="Users running at once")
+    parser.add_argument("--uploads", type=int, default=2, help="Documents per user")
+    parser.add_argument("--lists", type=int, default=3, help="Listing calls per user")
+    parser.add_argument("--file-size", type=int, default=64 * 1024, help="Upload size in bytes")
+    parser.add_argument(
+        "--poll-wait", type=int, default=0, help="Long-poll seconds; 0 polls with --poll-interval"
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.02)
+    parser.add_argument("--poll-timeout", type=float, default=60.0)
+    parser.add_argument("--page-delay-ms", type=float, default=5.0, help="Fake per-page work")
+    parser.add_argument("--processing-threads", type=int, default=4)
+    parser.add_argument("--worker-concurrency", type=int, default=4)
+    parser.add_argument(
+        "--bcrypt-rounds", type=int, default=4, help="Low by default so auth does not dominate"
+    )
+    parser.add_argument("--output", type=Path, help="Also write the report to this file")
+    parser.add_argument("--check", type=Path, help="JSON file of absolute thresholds")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    FAKE_PAGE_DELAY_SECONDS = args.page_delay_ms / 1000
+
+    workdir = Path(tempfile.mkdtemp(prefix="docapi-bench-"))
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{workdir / 'bench.db'}",
+            "UPLOAD_DIR": str(workdir / "uploads"),
+            "DEDUP_STORAGE_DIR": str(workdir / "uploads" / "dedup"),
+            "OBJECT_STORAGE_DIR": str(workdir / "uploads" / "bucket"),
+            "UPLOAD_STAGING_DIR": str(workdir / "uploads" / "staging"),
+            "PROFILING_DIR": str(workdir / "profiles"),
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "RESULT_CACHE_ENABLED": "false",
+        }
+    )
+
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    violations = []
+    if report["failed_users"]:
+        violations.append(f"{report['failed_users']} virtual users failed")
+    if args.check:
+        violations += check_thresholds(report, json.loads(args.check.read_text()))
+    if args.baseline:
+        violations += compare_baseline(
+            report, json.loads(args.baseline.read_text()), args.tolerance
+        )
+    for violation in violations:
+        print(f"REGRESSION {violation}", file=sys.stderr)
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
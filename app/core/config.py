@@ -4,16 +4,54 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
-DATABASE_URL: str = f"sqlite:///{BASE_DIR}/app.db"
-
 
 class Settings(BaseSettings):
     # App
     APP_NAME: str = "Document Lifecycle Management"
     DEBUG: bool = False
 
+    # Logging: records are queued and written by a background thread;
+    # when the queue is full new records are dropped (and counted)
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of access-log lines kept per route template; errors and
+    # slow requests are always logged
+    LOG_ACCESS_SAMPLE_RATES: dict[str, float] = {
+        "/documents/{document_id}/status": 0.1,
+        "/health": 0.0,
+        "/metrics": 0.0,
+    }
+    LOG_ACCESS_SLOW_MS: float = 1000.0
+
+    # Request profiling (off unless enabled; no middleware is installed otherwise)
+    PROFILING_ENABLED: bool = False
+    # Fraction of requests profiled without being asked to
+    PROFILING_SAMPLE_RATE: float = 0.0
+    # Requests carrying this header are profiled; when PROFILING_TOKEN is
+    # set the header value must match it
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_TOKEN: str | None = None
+    PROFILING_DIR: Path = Path("./profiles")
+    PROFILING_MAX_PROFILES: int = 200
+
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
+    # Defaults to DATABASE_URL with its async driver (aiosqlite, asyncpg, ...)
+    ASYNC_DATABASE_URL: str | None = None
+    DB_ECHO: bool = False
+
+    # SQLite tuning, applied as PRAGMAs on every new connection
+    DB_SQLITE_JOURNAL_MODE: str = "WAL"
+    DB_SQLITE_SYNCHRONOUS: str = "NORMAL"
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+
+    # Connection pool (server databases)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
 
     # JWT
     JWT_SECRET_KEY: str = "change-this-secret"
@@ -21,8 +59,84 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Password hashing (bcrypt cost is log2 rounds; lower it for dev/test)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_CONCURRENCY: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+
+    # Authenticated-principal cache (0 TTL disables it). Account changes made
+    # through the API evict a user's entries; the TTL bounds how long changes
+    # made elsewhere go unseen.
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
     # Storage
     UPLOAD_DIR: Path = Path("./uploads")
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # "local": sharded files under UPLOAD_DIR; "dedup": content-defined
+    # chunk dedup; "object": filesystem stand-in for an object store
+    STORAGE_BACKEND: str = "local"
+    DEDUP_STORAGE_DIR: Path = Path("./uploads/dedup")
+    OBJECT_STORAGE_DIR: Path = Path("./uploads/bucket")
+    DEDUP_MIN_CHUNK_SIZE: int = 16 * 1024
+    DEDUP_MAX_CHUNK_SIZE: int = 256 * 1024
+
+    # Batch uploads: files per request after ZIP expansion, and the total
+    # uncompressed size a single ZIP may expand to
+    BATCH_UPLOAD_MAX_FILES: int = 1000
+    BATCH_UPLOAD_MAX_EXPANDED_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # Resumable uploads: staging files live under UPLOAD_STAGING_DIR (keep
+    # it on the same filesystem as UPLOAD_DIR so finishing is a rename)
+    UPLOAD_STAGING_DIR: Path = Path("./uploads/staging")
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 60 * 60
+    UPLOAD_SESSION_MAX_BYTES: int = 5 * 1024 * 1024 * 1024
+
+    # Background jobs
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LEASE_SECONDS: int = 60
+    JOB_HEARTBEAT_SECONDS: int = 15
+    JOB_RETRY_BACKOFF_SECONDS: int = 10
+    JOB_RETRY_BACKOFF_MAX_SECONDS: int = 600
+    # 0 = one thread per processing pool slot (pool size + queue size)
+    WORKER_CONCURRENCY: int = 0
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    WORKER_STATS_INTERVAL_SECONDS: int = 30
+    # Port serving the worker's /metrics; 0 disables it
+    WORKER_METRICS_PORT: int = 0
+
+    # Reuse results for byte-identical files (keyed by SHA-256 + processor version)
+    RESULT_CACHE_ENABLED: bool = True
+    # zlib level for stored result pages (1 = fastest, 9 = smallest)
+    RESULT_COMPRESSION_LEVEL: int = 6
+
+    # Status notifications (long-poll / SSE)
+    STATUS_POLL_INTERVAL_SECONDS: float = 0.5
+    STATUS_LONG_POLL_MAX_SECONDS: int = 60
+    STATUS_SSE_KEEPALIVE_SECONDS: int = 15
+
+    # Processing pool / backpressure
+    PROCESSING_POOL_SIZE: int = 0  # 0 = os.cpu_count()
+    PROCESSING_POOL_QUEUE_SIZE: int = 4
+    PROCESSING_QUEUE_MAX: int = 1000
+    PROCESSING_RETRY_AFTER_SECONDS: int = 30
+
+    # Fair-share scheduling of processing jobs (see app/jobs/scheduler.py).
+    # A priority's weight is its relative share of workers while several
+    # are backlogged; a job costs 1 + size / SCHEDULER_COST_BYTES
+    SCHEDULER_PRIORITY_WEIGHTS: dict[str, float] = {
+        "interactive": 8.0,
+        "normal": 2.0,
+        "batch": 1.0,
+    }
+    SCHEDULER_COST_BYTES: int = 1024 * 1024
+    # Jobs one user may have running at once across all workers; 0 = no cap
+    SCHEDULER_MAX_RUNNING_PER_USER: int = 0
+    # /stats reports each user's queue waits over this window, for at most
+    # SCHEDULER_STATS_MAX_USERS users (longest-waiting first)
+    SCHEDULER_WAIT_WINDOW_SECONDS: int = 3600
+    SCHEDULER_STATS_MAX_USERS: int = 100
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -31,5 +145,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-
-UPLOAD_DIR = "./uploads"
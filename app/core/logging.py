@@ -1,12 +1,39 @@
 # app/core/logging.py
+import atexit
+import copy
 import json
 import logging
+import queue
+import random
+import threading
 import time
 import uuid
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict
 
-from fastapi import Request
-from starlette.responses import Response
+from app.core.config import settings
+from app.core.metrics import registry
+
+try:
+    import orjson
+except ImportError:  # optional, faster serialization
+    orjson = None
+
+log_records_dropped = registry.counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+    ("level",),
+)
+
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=str).decode()
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
 
 # --- JSON Formatter ---
 class JsonFormatter(logging.Formatter):
@@ -21,40 +48,127 @@ class JsonFormatter(logging.Formatter):
         if hasattr(record, "extra") and isinstance(record.extra, dict):
             log_record.update(record.extra)
 
-        return json.dumps(log_record, ensure_ascii=False)
+        if record.exc_text:
+            log_record["exception"] = record.exc_text
+
+        return _dumps(log_record)
+
+
+# --- Background writer ---
+class _BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without ever blocking the caller.
+    Formatting and serialization happen on the writer thread; here the
+    record is only made safe to pass across threads.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc(record.levelname)
+
+
+_log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+_queue_handler = _BoundedQueueHandler(_log_queue)
+_listener: QueueListener | None = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(JsonFormatter())
+        _listener = QueueListener(_log_queue, stream_handler)
+        _listener.start()
+        # Flush what is still queued on interpreter exit
+        atexit.register(_listener.stop)
+
+
+def log_stats() -> Dict[str, int]:
+    return {
+        "queued": _log_queue.qsize(),
+        "capacity": _log_queue.maxsize,
+        "dropped": int(sum(value for _, _, value in log_records_dropped.samples())),
+    }
+
 
 # --- Logger setup ---
 def get_logger(name: str = "app") -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
+        _ensure_listener()
+        logger.addHandler(_queue_handler)
         logger.propagate = False
     return logger
 
 logger = get_logger("app.request")
 
-# --- Middleware function ---
-async def logging_middleware(request: Request, call_next):
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-
-    start_time = time.perf_counter()
-    response: Response = await call_next(request)
-    duration_ms = (time.perf_counter() - start_time) * 1000
-
-    logger.info(
-        "http_request",
-        extra={
-            "extra": {
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "duration_ms": round(duration_ms, 2),
-            }
-        },
-    )
-    return response
+
+# --- Access log middleware ---
+class AccessLogMiddleware:
+    """
+    Pure ASGI access logger (no per-request task or body buffering).
+
+    Routes listed in LOG_ACCESS_SAMPLE_RATES are sampled; server errors and
+    requests slower than LOG_ACCESS_SLOW_MS are always logged. Sampled
+    lines carry their sample_rate so counts can be scaled back up.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            route = getattr(scope.get("route"), "path", None)
+            sample_rate = settings.LOG_ACCESS_SAMPLE_RATES.get(route, 1.0)
+
+            sampled = not (
+                sample_rate >= 1.0
+                or status_code >= 500
+                or duration_ms >= settings.LOG_ACCESS_SLOW_MS
+            )
+            if not sampled or random.random() < sample_rate:
+                fields = {
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "duration_ms": round(duration_ms, 2),
+                }
+                if sampled:
+                    fields["sample_rate"] = sample_rate
+                logger.info("http_request", extra={"extra": fields})
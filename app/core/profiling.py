@@ -0,0 +1,243 @@
+# app/core/profiling.py
+
+"""
+Opt-in per-request profiling.
+
+With PROFILING_ENABLED, requests selected by header (PROFILING_HEADER,
+optionally checked against PROFILING_TOKEN) or by PROFILING_SAMPLE_RATE
+run under cProfile. Each profile is written to a bounded ring buffer on
+disk as a pstats dump (<seq>-<request_id>.prof, loadable with
+`python -m pstats` or snakeviz) next to a JSON summary that attributes
+time to DB, auth, serialization and storage.
+
+Attribution:
+- Time on the event-loop thread is split by the module of each function
+  in the profile (tottime), so the categories add up to loop_ms.
+- DB time is additionally measured as wall time per statement through
+  engine events, which covers time spent waiting on the driver.
+Work offloaded to threads (password hashing, storage copies) shows only
+as wall time of the request.
+
+One request is profiled at a time; cProfile is per thread and would
+otherwise interleave. Concurrent requests on the same loop still show up
+in the profile, so the summary records how many were in flight.
+
+When profiling is disabled the middleware is not installed and the
+engine listeners are not attached, so there is no overhead at all.
+"""
+
+import asyncio
+import cProfile
+import contextvars
+import json
+import pstats
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# (category, substrings of "file:function") — first match wins
+CATEGORIES = (
+    ("db", ("/sqlalchemy/", "/aiosqlite/", "sqlite3", "/app/db/")),
+    ("auth", ("/jose/", "/passlib/", "/bcrypt/", "/app/core/security.py", "/app/auth/")),
+    ("serialization", ("/pydantic", "/json/", "orjson", "/fastapi/encoders.py", "/fastapi/_compat")),
+    ("storage", ("/app/storage/", "/shutil.py", "/tempfile.py")),
+)
+
+TOP_FUNCTIONS = 25
+
+
+class _RequestProfile:
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.db_seconds = 0.0
+        self.db_statements = 0
+
+
+_current: contextvars.ContextVar[Optional[_RequestProfile]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+# -------------------------
+# DB wall-time attribution
+# -------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is not None and starts:
+        profile.db_seconds += time.perf_counter() - starts.pop()
+        profile.db_statements += 1
+
+
+def attach_db_listeners(engines: Iterable[Engine]) -> None:
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# -------------------------
+# Summaries
+# -------------------------
+def _category(file_and_function: str) -> str:
+    for name, markers in CATEGORIES:
+        if any(marker in file_and_function for marker in markers):
+            return name
+    return "other"
+
+
+def summarize(profiler: cProfile.Profile) -> Dict[str, object]:
+    stats = pstats.Stats(profiler)
+    loop_by_category: Dict[str, float] = {name: 0.0 for name, _ in CATEGORIES}
+    loop_by_category["other"] = 0.0
+    rows = []
+    for (filename, line, function), (_cc, calls, tottime, cumtime, _callers) in stats.stats.items():
+        loop_by_category[_category(f"{filename}:{function}")] += tottime
+        rows.append((cumtime, tottime, calls, f"{filename}:{line}({function})"))
+
+    rows.sort(reverse=True)
+    return {
+        "loop_ms": round(stats.total_tt * 1000, 2),
+        "loop_ms_by_category": {k: round(v * 1000, 2) for k, v in loop_by_category.items()},
+        "top_cumulative": [
+            {"function": name, "calls": calls, "tottime_ms": round(tt * 1000, 3), "cumtime_ms": round(ct * 1000, 3)}
+            for ct, tt, calls, name in rows[:TOP_FUNCTIONS]
+        ],
+    }
+
+
+# -------------------------
+# On-disk ring buffer
+# -------------------------
+class ProfileRingBuffer:
+    """Keeps the newest max_profiles profiles; older ones are deleted."""
+
+    def __init__(self, directory: Path, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, request_id: str, profiler: cProfile.Profile, summary: Dict[str, object]) -> Path:
+        # Zero-padded nanosecond prefix: lexical order is age order
+        stem = f"{time.time_ns():020d}-{request_id}"
+        profiler.dump_stats(self.directory / f"{stem}.prof")
+        (self.directory / f"{stem}.json").write_text(json.dumps(summary, indent=2))
+        self._prune()
+        return self.directory / f"{stem}.prof"
+
+    def _prune(self) -> None:
+        with self._lock:
+            profiles = sorted(self.directory.glob("*.prof"))
+            for stale in profiles[: max(len(profiles) - self.max_profiles, 0)]:
+                stale.unlink(missing_ok=True)
+                stale.with_suffix(".json").unlink(missing_ok=True)
+
+    def find(self, request_id: str) -> List[Path]:
+        return sorted(self.directory.glob(f"*-{request_id}.*"))
+
+
+# -------------------------
+# Middleware
+# -------------------------
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware; install inside AccessLogMiddleware so the
+    request_id it assigns keys the profile. Profiled responses carry an
+    X-Profile-Id header.
+    """
+
+    def __init__(self, app, engines: Iterable[Engine] = ()):
+        self.app = app
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.header = settings.PROFILING_HEADER.lower().encode()
+        self.token = settings.PROFILING_TOKEN
+        self.ring = ProfileRingBuffer(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
+        self._busy = False
+        self._in_flight = 0
+        attach_db_listeners(engines)
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return self.token is None or value.decode() == self.token
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        try:
+            if self._busy or not (
+                self._requested(scope) or random.random() < self.sample_rate
+            ):
+                await self.app(scope, receive, send)
+                return
+            await self._profile(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _profile(self, scope, receive, send) -> None:
+        state = scope.setdefault("state", {})
+        request_id = state.get("request_id") or str(uuid.uuid4())
+        request_profile = _RequestProfile(request_id)
+        token = _current.set(request_profile)
+        status_code = 500
+        max_concurrent = self._in_flight
+
+        async def send_wrapper(message):
+            nonlocal status_code, max_concurrent
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-profile-id", request_id.encode())]
+            max_concurrent = max(max_concurrent, self._in_flight)
+            await send(message)
+
+        self._busy = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            wall_seconds = time.perf_counter() - started
+            self._busy = False
+            _current.reset(token)
+
+        route = getattr(scope.get("route"), "path", None)
+        summary = {
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status_code": status_code,
+            "wall_ms": round(wall_seconds * 1000, 2),
+            "db": {
+                "statements": request_profile.db_statements,
+                "wall_ms": round(request_profile.db_seconds * 1000, 2),
+            },
+            "concurrent_requests": max_concurrent,
+        }
+        # Profile analysis and file I/O stay off the event loop
+        await asyncio.to_thread(self._write, request_id, profiler, summary)
+
+    def _write(self, request_id: str, profiler: cProfile.Profile, summary: Dict[str, object]) -> None:
+        summary.update(summarize(profiler))
+        self.ring.write(request_id, profiler, summary)
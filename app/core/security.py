@@ -1,22 +1,37 @@
 #app/core/security
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.db.models import User
 
 # -------------------------
 # Password hashing
 # -------------------------
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes needs_update() flag hashes
+# made with any other cost, so they get rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 security = HTTPBearer()
 
@@ -28,6 +43,88 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so hashing proceeds in parallel without
+    occupying the event loop or the shared request threadpool. At most
+    max_pending operations may be queued or running; beyond that callers
+    get PasswordHasherBusyError immediately instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def _run(self, fn: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusyError("Password hashing queue is full")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+
+        def task():
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return fn(*args)
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(task))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; when the stored hash uses an outdated cost,
+        also return a fresh hash to persist.
+        """
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "queue_wait_avg_ms": round(self._wait_total / completed * 1000, 2) if completed else 0.0,
+                "queue_wait_max_ms": round(self._wait_max * 1000, 2),
+            }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_CONCURRENCY,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 # -------------------------
 # JWT helpers
 # -------------------------
@@ -59,22 +156,56 @@ def create_refresh_token(subject: str) -> str:
     )
 
 
+# -------------------------
+# Principal cache
+# -------------------------
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, detached from any DB session."""
+    id: int
+    email: str
+
+
+# token -> Principal, grouped by user id; entries never outlive the
+# token's own expiry. Changes made outside the API (e.g. a user deleted
+# directly in the database) are only picked up once AUTH_CACHE_TTL_SECONDS
+# has passed.
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_user(user_id: int) -> int:
+    """
+    Drop cached principals for a user, e.g. after the account changes.
+    Returns the number of cached tokens evicted.
+    """
+    return principal_cache.discard_group(user_id)
+
+
 # -------------------------
 # Auth dependencies
 # -------------------------
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    token = credentials.credentials
+
+    # Fast path: a token we already verified maps straight to its principal
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token = credentials.credentials
-
     try:
         payload = jwt.decode(
             token,
@@ -87,9 +218,13 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
     if user is None:
         raise credentials_exception
 
-    return user
+    principal = Principal(id=user.id, email=user.email)
+    expires_in = payload.get("exp", 0) - time.time()
+    principal_cache.set(token, principal, ttl=expires_in, group=user.id)
 
+    return principal
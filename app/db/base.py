@@ -1,6 +1,13 @@
 #app/db/base
+from datetime import UTC, datetime
+
 from sqlalchemy.orm import DeclarativeBase
 
 # Shared declarative base for all SQLAlchemy ORM models
 class Base(DeclarativeBase):
     pass
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, matching how DateTime columns are stored."""
+    return datetime.now(UTC).replace(tzinfo=None)
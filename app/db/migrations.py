@@ -0,0 +1,105 @@
+#app/db/migrations
+"""
+Startup schema upgrade.
+
+Creating missing tables is not enough: databases created by an older
+version of the app also need the columns and indexes added to existing
+tables since, so upgrade_schema adds those with ALTER TABLE ... ADD
+COLUMN. It is idempotent and safe to run from several processes at
+once; the API and job workers both run it on startup.
+
+Only additive changes are handled. New columns must be nullable or have
+a constant default, which existing rows are filled with. The one data
+fix is rewriting SQLite timestamps left by the old server default, see
+_normalize_legacy_timestamps.
+"""
+
+from sqlalchemy import inspect, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import Column, CreateIndex, CreateTable
+
+from app.core.logging import get_logger
+from app.db import models  # noqa: F401  (registers the tables on Base)
+from app.db.base import Base
+
+logger = get_logger("migrations")
+
+
+def _column_ddl(engine: Engine, column: Column) -> str:
+    dialect = engine.dialect
+    ddl = f"{dialect.identifier_preparer.format_column(column)} {column.type.compile(dialect=dialect)}"
+    default = column.default
+    if default is not None and default.is_scalar:
+        value = literal(default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={"literal_binds": True}
+        )
+        ddl += f" DEFAULT {value}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+
+def _add_column(engine: Engine, table_name: str, column: Column) -> bool:
+    table = engine.dialect.identifier_preparer.quote(table_name)
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {_column_ddl(engine, column)}")
+    except (OperationalError, ProgrammingError):
+        # Another process may have added it first
+        existing = {c["name"] for c in inspect(engine).get_columns(table_name)}
+        if column.name in existing:
+            return False
+        raise
+    return True
+
+
+# SQLite stores DateTime as text. The server default func.now() wrote
+# "YYYY-MM-DD HH:MM:SS", whereas SQLAlchemy binds datetimes as
+# "YYYY-MM-DD HH:MM:SS.ffffff", and text comparison puts the short form
+# first even for the same instant. Keyset cursors compare against bound
+# values, so legacy rows are padded to the bound format.
+_LEGACY_TIMESTAMPS = (("documents", "created_at"),)
+
+
+def _normalize_legacy_timestamps(engine: Engine) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        for table_name, column_name in _LEGACY_TIMESTAMPS:
+            table, column = quote(table_name), quote(column_name)
+            result = conn.exec_driver_sql(
+                f"UPDATE {table} SET {column} = {column} || '.000000' "
+                f"WHERE length({column}) = 19"
+            )
+            if result.rowcount:
+                logger.info(
+                    "timestamps_normalized",
+                    extra={"extra": {"column": f"{table_name}.{column_name}", "rows": result.rowcount}},
+                )
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Create missing tables, then add missing columns and indexes."""
+    # IF NOT EXISTS rather than create_all's check-then-create, which
+    # fails when another process creates a table in between
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table, if_not_exists=True))
+
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and _add_column(engine, table.name, column):
+                added.append(f"{table.name}.{column.name}")
+        with engine.begin() as conn:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+    if added:
+        logger.info("schema_upgraded", extra={"extra": {"columns": added}})
+
+    _normalize_legacy_timestamps(engine)
@@ -1,9 +1,9 @@
 #app/db/models
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, Float, Integer, LargeBinary, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
-from app.db.base import Base
+from app.db.base import Base, utcnow
 
 
 class User(Base):
@@ -18,6 +18,10 @@ class User(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Serves the per-user listing: filter on user_id, keyset on (created_at, id)
+        Index("ix_documents_user_created_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -25,11 +29,19 @@ class Document(Base):
 
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
+    size_bytes = Column(BigInteger, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
 
     status = Column(String, nullable=False, default="UPLOADED")
-    result = Column(Text, nullable=True)
+    # Processing progress, updated as pages are extracted
+    pages_done = Column(Integer, nullable=True)
+    pages_total = Column(Integer, nullable=True)
+    # Plain-text results written before results moved to document_results;
+    # deferred so loading a document never pulls a large blob
+    result = deferred(Column(Text, nullable=True))
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side so stored values round-trip exactly through pagination cursors
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -37,3 +49,135 @@ class Document(Base):
     )
 
     user = relationship("User", back_populates="documents")
+
+
+class Job(Base):
+    """
+    Durable unit of background work.
+
+    Workers claim QUEUED jobs by taking a time-limited lease and keep it
+    alive with heartbeats. A job whose lease expires (worker crash, restart)
+    becomes claimable again; failures are retried with backoff until
+    max_attempts is reached, after which the job is dead-lettered.
+
+    Claim order is fair-share across users (see app.jobs.scheduler): the
+    lowest virtual_finish tag goes first.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # Claim order
+        Index("ix_jobs_status_finish", "status", "virtual_finish"),
+        # Last finish tag of a flow (one user's jobs of one priority)
+        Index("ix_jobs_flow_finish", "user_id", "priority", "virtual_finish"),
+        # Recent queue waits, per user
+        Index("ix_jobs_started_at", "started_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    # Owner of the document, denormalized for scheduling
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    priority = Column(String, nullable=False, default="normal")
+    virtual_start = Column(Float, nullable=True)
+    virtual_finish = Column(Float, nullable=True)
+
+    status = Column(String, nullable=False, default="QUEUED")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    # First claim, and how long the job had waited for it
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    queue_wait_seconds = Column(Float, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+class SchedulerClock(Base):
+    """Single row holding the fair-share scheduler's virtual time."""
+    __tablename__ = "scheduler_clock"
+
+    id = Column(Integer, primary_key=True)
+    virtual_time = Column(Float, nullable=False, default=0.0)
+
+
+class ResultCacheEntry(Base):
+    """
+    Processing output keyed by file content and processor version,
+    so identical uploads are only ever processed once.
+    """
+    __tablename__ = "result_cache"
+
+    content_hash = Column(String(64), primary_key=True)
+    processor_version = Column(String, primary_key=True)
+    result = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DocumentResult(Base):
+    """
+    Summary of a document's processing result. The per-page content
+    lives in DocumentResultPage so reads can fetch only the pages asked for.
+    """
+    __tablename__ = "document_results"
+
+    document_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+    processor_version = Column(String, nullable=False)
+    language = Column(String, nullable=True)
+    confidence = Column(Float, nullable=True)
+    page_count = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DocumentResultPage(Base):
+    """One page of a result, stored as zlib-compressed JSON."""
+    __tablename__ = "document_result_pages"
+
+    document_id = Column(Integer, ForeignKey("documents.id"), primary_key=True)
+    page_number = Column(Integer, primary_key=True)
+    content = Column(LargeBinary, nullable=False)
+
+
+class SearchIndexState(Base):
+    """
+    Single row tracking the search index backfill (app.documents.search),
+    committed with each indexed batch so an interrupted backfill resumes.
+    """
+    __tablename__ = "search_index_state"
+
+    id = Column(Integer, primary_key=True)
+    # Highest document_results.document_id indexed so far
+    backfilled_through = Column(Integer, nullable=False, default=0)
+    # Set once the backfill has finished
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class UploadSession(Base):
+    """
+    A resumable upload in progress. The bytes received so far live in a
+    staging file named after the session id; offset mirrors its size.
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    # Total length announced by the client, if it knew it up front
+    size = Column(BigInteger, nullable=True)
+    offset = Column(BigInteger, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), default=utcnow)
+    # Pushed forward by every chunk; expired sessions are removed by workers
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
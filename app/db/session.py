@@ -1,15 +1,172 @@
-from sqlalchemy import create_engine
+#app/db/session
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker
-import os
 
-DATABASE_URL = "sqlite:///./app.db"
+from app.core.config import settings
+from app.core.metrics import db_sessions_active, db_sessions_opened, registry
 
-print("🚨 SQLALCHEMY DATABASE PATH =", os.path.abspath("app.db"))
+# Async driver used when DATABASE_URL names a backend without one
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL to its async counterpart,
+    e.g. sqlite:///./app.db -> sqlite+aiosqlite:///./app.db.
+    URLs that already name a driver are used as-is.
+    """
+    parsed = make_url(url)
+    if "+" in parsed.drivername or parsed.drivername not in ASYNC_DRIVERS:
+        return url
+    driver = f"{parsed.drivername}+{ASYNC_DRIVERS[parsed.drivername]}"
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# -------------------------
+# Pool metrics
+# -------------------------
+
+class PoolMetrics:
+    """Counts pool checkouts/checkins and tracks connections in use."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.max_in_use = 0
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *_args) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_args) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def _on_checkin(self, *_args) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_invalidate(self, *_args) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+            }
+
+
+# -------------------------
+# Engine factory
+# -------------------------
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return _is_sqlite(url) and make_url(url).database in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    """
+    WAL lets readers proceed while a writer commits; synchronous=NORMAL is
+    durable under WAL except on power loss; busy_timeout makes writers wait
+    for the lock instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.DB_SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.DB_SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.DB_SQLITE_MMAP_SIZE)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.DB_SQLITE_CACHE_SIZE_KB)}")
+    finally:
+        cursor.close()
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases live in a single connection; leave their pool alone
+        if not _is_sqlite_memory(url):
+            options["pool_size"] = settings.DB_POOL_SIZE
+            options["max_overflow"] = settings.DB_MAX_OVERFLOW
+            options["pool_timeout"] = settings.DB_POOL_TIMEOUT_SECONDS
+    else:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return options
+
+
+def _instrument(sync_engine: Engine, url: str, metrics: PoolMetrics) -> None:
+    if _is_sqlite(url):
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    metrics.attach(sync_engine)
+
+
+def build_engine(url: str, metrics: PoolMetrics) -> Engine:
+    """Sync engine configured from settings: pragmas, pooling and metrics."""
+    engine = create_engine(url, **_engine_options(url))
+    _instrument(engine, url, metrics)
+    return engine
+
+
+def build_async_engine(url: str, metrics: PoolMetrics) -> AsyncEngine:
+    """Async counterpart of build_engine."""
+    engine = create_async_engine(url, **_engine_options(url))
+    _instrument(engine.sync_engine, url, metrics)
+    return engine
+
+
+DATABASE_URL = settings.DATABASE_URL
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+# Sync engine: job workers and schema creation
+engine = build_engine(DATABASE_URL, pool_metrics)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -17,9 +174,45 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
-def get_db():
-    db = SessionLocal()
+# Async engine: API routes
+async_engine = build_async_engine(ASYNC_DATABASE_URL, async_pool_metrics)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        "sync": {**pool_metrics.stats(), "pool": engine.pool.status()},
+        "async": {**async_pool_metrics.stats(), "pool": async_engine.pool.status()},
+    }
+
+
+def _pool_collector():
+    engines = (("sync", pool_metrics), ("async", async_pool_metrics))
+    stats = [(name, metrics.stats()) for name, metrics in engines]
+    for metric, type_, key, help_ in (
+        ("db_pool_connections_in_use", "gauge", "in_use", "Pooled connections checked out"),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Pool checkouts"),
+        ("db_pool_connects_total", "counter", "connects", "New DBAPI connections opened"),
+        ("db_pool_invalidations_total", "counter", "invalidations", "Connections invalidated"),
+    ):
+        samples = [(metric, {"engine": name}, s[key]) for name, s in stats]
+        yield metric, type_, help_, samples
+
+
+registry.add_collector(_pool_collector)
+
+
+async def get_async_db():
+    db_sessions_opened.inc("async")
+    db_sessions_active.inc("async")
     try:
-        yield db
+        async with AsyncSessionLocal() as db:
+            yield db
     finally:
-        db.close()
+        db_sessions_active.dec("async")
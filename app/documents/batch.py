@@ -0,0 +1,151 @@
+# app/documents/batch.py
+
+"""
+Staging for batch uploads.
+
+A batch is a list of uploaded parts; a ZIP part is expanded into its
+members, each of which becomes one document. Staging writes every item to
+storage (streaming, member by member, never holding a file in memory) and
+reports per item what was stored or why it was rejected, so one bad file
+does not fail the rest. Recording the stored items is the service's job.
+
+Runs in a worker thread. Decoupled from FastAPI and database layers.
+"""
+
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import BinaryIO, Callable, List, Optional
+
+from app.core.config import settings
+from app.storage.base import StorageBackend, StoredFile
+
+ALLOWED_TYPES = {
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+ZIP_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
+class BatchUploadError(Exception):
+    """The batch as a whole was rejected; nothing was stored."""
+    pass
+
+
+@dataclass(frozen=True)
+class UploadPart:
+    filename: str
+    content_type: Optional[str]
+    file: BinaryIO
+
+
+@dataclass
+class StagedItem:
+    filename: str
+    stored: Optional[StoredFile] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class _PlannedItem:
+    filename: str
+    open: Optional[Callable[[], BinaryIO]] = None
+    error: Optional[str] = None
+
+
+def _is_zip(part: UploadPart) -> bool:
+    return part.content_type in ZIP_TYPES or (
+        part.content_type in (None, "application/octet-stream")
+        and part.filename.lower().endswith(".zip")
+    )
+
+
+def _zip_members(part: UploadPart, archives: List[zipfile.ZipFile]) -> List[_PlannedItem]:
+    try:
+        archive = zipfile.ZipFile(part.file)
+    except zipfile.BadZipFile:
+        return [_PlannedItem(part.filename, error="Not a valid ZIP archive")]
+    archives.append(archive)
+
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir()
+        # Resource forks and dotfiles added by archivers are not documents
+        and not info.filename.startswith("__MACOSX/")
+        and not PurePosixPath(info.filename).name.startswith(".")
+    ]
+    # Declared sizes are enforced while reading (zipfile stops at
+    # file_size and checks the CRC), so this bounds the real expansion
+    expanded = sum(info.file_size for info in members)
+    if expanded > settings.BATCH_UPLOAD_MAX_EXPANDED_BYTES:
+        raise BatchUploadError(
+            f"'{part.filename}' expands to {expanded} bytes "
+            f"(limit {settings.BATCH_UPLOAD_MAX_EXPANDED_BYTES})"
+        )
+
+    return [
+        _PlannedItem(
+            PurePosixPath(info.filename).name,
+            open=lambda info=info: archive.open(info),
+        )
+        for info in members
+    ]
+
+
+def _plan(parts: List[UploadPart], archives: List[zipfile.ZipFile]) -> List[_PlannedItem]:
+    planned: List[_PlannedItem] = []
+    for part in parts:
+        if _is_zip(part):
+            planned.extend(_zip_members(part, archives))
+        elif part.content_type in ALLOWED_TYPES:
+            planned.append(_PlannedItem(part.filename, open=lambda part=part: part.file))
+        else:
+            planned.append(
+                _PlannedItem(part.filename, error="Only PDF and DOCX files are allowed")
+            )
+
+    if len(planned) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise BatchUploadError(
+            f"Batch holds {len(planned)} files (limit {settings.BATCH_UPLOAD_MAX_FILES})"
+        )
+    return planned
+
+
+def stage_batch(storage: StorageBackend, parts: List[UploadPart]) -> List[StagedItem]:
+    """
+    Write every item of the batch to storage, in order.
+    The whole batch is checked against the size limits before anything is
+    written; after that, failures are per item, except unexpected errors,
+    which remove everything stored so far and propagate.
+    """
+    archives: List[zipfile.ZipFile] = []
+    staged: List[StagedItem] = []
+    try:
+        for item in _plan(parts, archives):
+            if item.error is not None:
+                staged.append(StagedItem(item.filename, error=item.error))
+                continue
+            try:
+                with item.open() as stream:
+                    stored = storage.save_stream(item.filename, stream)
+            except (ValueError, zipfile.BadZipFile, NotImplementedError) as exc:
+                # Bad extension, corrupt member or unsupported compression
+                staged.append(StagedItem(item.filename, error=str(exc)))
+            else:
+                staged.append(StagedItem(item.filename, stored=stored))
+        return staged
+    except BaseException:
+        # Anything else (full disk, storage outage) fails the whole batch;
+        # the caller never sees the items stored so far, so remove them here
+        discard_staged(storage, staged)
+        raise
+    finally:
+        for archive in archives:
+            archive.close()
+
+
+def discard_staged(storage: StorageBackend, staged: List[StagedItem]) -> None:
+    """Remove stored items again, e.g. when recording them failed."""
+    for item in staged:
+        if item.stored is not None:
+            storage.delete(item.stored.path)
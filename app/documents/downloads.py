@@ -0,0 +1,159 @@
+# app/documents/downloads.py
+
+"""
+Serving stored originals over HTTP.
+
+When the storage backend keeps a plain file, the response is a
+FileResponse: the file is streamed by the server without passing through
+application code per byte (sendfile where the server supports it), and
+Starlette handles Range / If-Range itself. Backends without a plain file
+(e.g. dedup) are streamed from open_range with single-range support.
+
+The ETag is the SHA-256 of the content, so it is strong and identical
+across backends and replicas.
+"""
+
+import asyncio
+import os
+from mimetypes import guess_type
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+
+from app.core.config import settings
+from app.db.models import Document
+from app.storage.base import StorageBackend
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+class DocumentFileResponse(FileResponse):
+    # Fewer, larger reads when the server cannot use sendfile
+    chunk_size = settings.UPLOAD_CHUNK_SIZE
+
+
+def etag_for(document: Document) -> Optional[str]:
+    if not document.content_hash:
+        return None
+    return f'"{document.content_hash}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into a half-open (start, end) pair.
+    Returns None when the header should be ignored (malformed, other units
+    or multiple ranges), in which case the full body is sent.
+    """
+    units, _, spec = header.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+        elif last:
+            start, end = max(size - int(last), 0), size
+        else:
+            return None
+    except ValueError:
+        return None
+
+    if start >= size or (first and last and end <= start):
+        raise RangeNotSatisfiableError()
+    return start, min(end, size)
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def document_file_response(
+    request: Request,
+    document: Document,
+    storage: StorageBackend,
+) -> Response:
+    """
+    Build the response for GET /documents/{id}/file.
+    Raises FileNotFoundError if storage no longer holds the file.
+    """
+    etag = etag_for(document)
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag is not None:
+        headers["ETag"] = etag
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    path = storage.direct_path(document.file_path)
+    if path is not None:
+        stat_result = await asyncio.to_thread(os.stat, path)
+        return DocumentFileResponse(
+            path,
+            headers=headers,
+            filename=document.filename,
+            stat_result=stat_result,
+        )
+
+    file_stat = await asyncio.to_thread(storage.stat, document.file_path)
+    size = file_stat.size
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Disposition"] = _content_disposition(document.filename)
+    media_type = guess_type(document.filename)[0] or "application/octet-stream"
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header is not None and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=416, headers={"Content-Range": f"bytes */{size}"}
+            )
+
+    status_code = 200
+    start, end = 0, size
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    headers["Content-Length"] = str(end - start)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    stream = await asyncio.to_thread(
+        storage.open_range, document.file_path, start, end - start
+    )
+
+    def read_chunks():
+        with stream:
+            while chunk := stream.read(settings.UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+    return StreamingResponse(
+        iterate_in_threadpool(read_chunks()),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
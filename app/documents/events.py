@@ -0,0 +1,127 @@
+# app/documents/events.py
+
+"""
+In-process notification hub for document status changes.
+
+AsyncDocumentService publishes every transition it commits. Transitions
+made elsewhere (job workers run in separate processes) are picked up by a
+single background poller that, only while someone is listening, reads the
+status of the watched documents in one query per interval. Long-poll and
+SSE endpoints wait on the hub instead of hitting the database per client.
+
+All methods must be called from the event loop.
+"""
+
+import asyncio
+import contextlib
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.models import Document
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger("document.events")
+
+
+class StatusHub:
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._known: Dict[int, str] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.published = 0
+
+    # -------------------------
+    # Publishing
+    # -------------------------
+    def publish(self, document_id: int, status: str) -> None:
+        if self._known.get(document_id) == status:
+            return
+        if document_id in self._subscribers:
+            self._known[document_id] = status
+
+        for queue in self._subscribers.get(document_id, ()):
+            if queue.full():
+                # Slow consumer: only the most recent status matters
+                queue.get_nowait()
+            queue.put_nowait(status)
+        self.published += 1
+
+    # -------------------------
+    # Subscribing
+    # -------------------------
+    @contextlib.asynccontextmanager
+    async def subscribe(self, document_id: int, current_status: str) -> AsyncIterator[asyncio.Queue]:
+        """Yield a queue receiving every later status of document_id."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+        self._subscribers[document_id].add(queue)
+        self._known.setdefault(document_id, current_status)
+        self._ensure_poller()
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(document_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[document_id]
+                    self._known.pop(document_id, None)
+
+    async def wait_for_change(self, document_id: int, current_status: str, timeout: float) -> str:
+        """Block until the status differs from current_status or timeout elapses."""
+        async with self.subscribe(document_id, current_status) as queue:
+            # A change may have landed between the caller's read and subscribing
+            known = self._known.get(document_id, current_status)
+            if known != current_status:
+                return known
+            try:
+                return await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                return current_status
+
+    # -------------------------
+    # Cross-process fallback
+    # -------------------------
+    def _ensure_poller(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                continue
+            try:
+                await self._poll_once()
+            except Exception:
+                logger.exception("status_poll_failed")
+
+    async def _poll_once(self) -> None:
+        watched = list(self._subscribers)
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(Document.id, Document.status).where(Document.id.in_(watched))
+            )
+            for document_id, status in rows:
+                self.publish(document_id, status)
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._poller
+            self._poller = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "watched_documents": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+        }
+
+
+status_hub = StatusHub(poll_interval=settings.STATUS_POLL_INTERVAL_SECONDS)
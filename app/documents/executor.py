@@ -0,0 +1,121 @@
+# app/documents/executor.py
+
+"""
+Bounded process pool for CPU-heavy document processing.
+
+processor.process_document is synchronous and CPU/IO-blocking, so it runs
+in worker processes instead of threads. Submissions are capped at
+pool size + PROCESSING_POOL_QUEUE_SIZE; beyond that submit() fails fast
+with ProcessingQueueFullError rather than queueing unbounded work.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class ProcessingQueueFullError(Exception):
+    pass
+
+
+class ProcessingExecutor:
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        queue_size: int | None = None,
+        pool: Executor | None = None,
+    ):
+        """
+        pool overrides the spawn-context process pool (e.g. a thread pool
+        for benchmarks running a fake processor in-process).
+        """
+        self.max_workers = max_workers or settings.PROCESSING_POOL_SIZE or os.cpu_count() or 1
+        self.queue_size = (
+            settings.PROCESSING_POOL_QUEUE_SIZE if queue_size is None else queue_size
+        )
+        self.capacity = self.max_workers + self.queue_size
+
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        # spawn: the parent runs DB and heartbeat threads, which must not be forked
+        self._pool = pool or ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def has_capacity(self) -> bool:
+        with self._lock:
+            return self._in_flight < self.capacity
+
+    def submit(self, fn: Callable, *args, block: bool = False) -> Future:
+        """
+        Submit without blocking; raises ProcessingQueueFullError when saturated.
+        With block=True, wait for a free slot instead (used to fan out work
+        belonging to a job that has already been admitted).
+        """
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self._rejected += 1
+            raise ProcessingQueueFullError(
+                f"Processing pool saturated ({self.capacity} tasks in flight)"
+            )
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn: Callable, *args, block: bool = False):
+        """Submit (see submit for block) and wait for the result in the calling thread."""
+        return self.submit(fn, *args, block=block).result()
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None:
+                self._completed += 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            in_flight = self._in_flight
+            completed = self._completed
+            rejected = self._rejected
+        busy = min(in_flight, self.max_workers)
+        return {
+            "pool_size": self.max_workers,
+            "queue_capacity": self.queue_size,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.max_workers, 0),
+            "utilization": round(busy / self.max_workers, 3),
+            "completed": completed,
+            "rejected": rejected,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[ProcessingExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_processing_executor() -> ProcessingExecutor:
+    """Process-wide executor, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessingExecutor()
+        return _executor
@@ -0,0 +1,110 @@
+# app/documents/pipeline.py
+
+"""
+Staged, page-parallel processing pipeline.
+
+    split ──► extract (pages fanned out over the process pool) ──► merge
+
+Split and merge run once per document; extraction runs one pool task per
+page, so a large document uses every pool process instead of one.
+Pages are handed to a callback as they finish, which lets the service
+persist them (and report progress) incrementally; a retried job passes
+those pages back in and only the missing ones are extracted again.
+
+Decoupled from FastAPI and database layers.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, List, Set, Tuple
+
+from app.documents import processor
+from app.documents.executor import ProcessingExecutor
+
+
+class ProcessingPipeline:
+    def __init__(
+        self,
+        executor: ProcessingExecutor,
+        on_split: Callable[[int, int], None],
+        on_pages: Callable[[List[dict], int], None],
+    ):
+        """
+        on_split(page_count, pages_done) is called once the page count is
+        known; on_pages(pages, pages_done) with each batch of newly
+        extracted pages.
+        """
+        self.executor = executor
+        self.on_split = on_split
+        self.on_pages = on_pages
+        # Pages of one document in flight at once; more would only queue
+        self.window = executor.max_workers
+
+    def run(
+        self,
+        file_path: str,
+        filename: str,
+        done: Dict[int, dict] | None = None,
+    ) -> Tuple[dict, Dict[str, float]]:
+        """
+        Process a document, skipping pages already present in `done`.
+        Returns the merged result and per-stage wall-clock timings in ms.
+        """
+        done = dict(done or {})
+        timings: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        # The job was admitted when it was claimed: wait for a pool slot
+        # like the page fan-out does, rather than failing the job while
+        # other jobs' pages fill the pool
+        split = self.executor.run(processor.split_document, file_path, filename, block=True)
+        page_count = split["page_count"]
+        # Drop pages a previous attempt stored beyond the current page count
+        done = {n: page for n, page in done.items() if n <= page_count}
+        timings["split_ms"] = _elapsed_ms(started)
+        self.on_split(page_count, len(done))
+
+        started = time.perf_counter()
+        remaining = iter([n for n in range(1, page_count + 1) if n not in done])
+        pending: Set[Future] = set()
+        try:
+            while True:
+                for number in remaining:
+                    pending.add(
+                        self.executor.submit(
+                            processor.extract_page,
+                            file_path,
+                            filename,
+                            number,
+                            page_count,
+                            block=True,
+                        )
+                    )
+                    if len(pending) >= self.window:
+                        break
+                if not pending:
+                    break
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pages = [f.result() for f in finished if f.exception() is None]
+                for page in pages:
+                    done[page["number"]] = page
+                if pages:
+                    self.on_pages(pages, len(done))
+                # Pages that did finish are kept for the retry
+                for future in finished:
+                    future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+        timings["extract_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        result = processor.merge_pages(list(done.values()))
+        timings["merge_ms"] = _elapsed_ms(started)
+
+        return result, timings
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
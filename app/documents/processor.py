@@ -4,6 +4,13 @@ app/documents/processor.py
 This module contains isolated, synchronous document processing logic.
 It simulates OCR/parsing/analysis without depending on FastAPI or database layers.
 
+Processing is split into stages so pages can be extracted in parallel:
+
+    split_document ──► extract_page (one call per page) ──► merge_pages
+
+process_document chains the stages sequentially for callers that do not
+need the fan-out.
+
 Design goals:
 - No framework or DB dependencies
 - Deterministic, testable core logic
@@ -14,7 +21,11 @@ Design goals:
 import os
 import time
 import random
-from typing import Dict
+from typing import Dict, List
+
+# Bump whenever extraction output changes; cached results produced by other
+# versions are ignored and purged.
+PROCESSOR_VERSION = "3"
 
 
 class DocumentProcessingError(Exception):
@@ -26,25 +37,17 @@ class DocumentProcessingError(Exception):
     pass
 
 
-def process_document(file_path: str, filename: str) -> Dict[str, object]:
-    """
-    Simulate processing of a document (OCR / parsing / analysis).
+# Simulated page density used to derive a page count from the file size
+SIMULATED_BYTES_PER_PAGE = 100 * 1024
+SIMULATED_MAX_PAGES = 1000
 
-    This function is synchronous and blocking by design.
-    It should be called from the service layer, not directly from API routes.
 
-    Parameters:
-        file_path (str): Absolute or relative path to the file on disk
-        filename (str): Original filename (used for metadata simulation)
+def split_document(file_path: str, filename: str) -> Dict[str, object]:
+    """
+    Stage 1: validate the file and determine its pages.
 
     Returns:
-        dict: Structured processing result:
-            {
-                "text": str,
-                "pages": int,
-                "language": str,
-                "confidence": float
-            }
+        dict: {"page_count": int}
 
     Raises:
         FileNotFoundError:
@@ -57,10 +60,8 @@ def process_document(file_path: str, filename: str) -> Dict[str, object]:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found at path: {file_path}")
 
-    # --- Simulate processing delay ---
-    # Represents OCR / parsing / ML inference time
-    processing_time = random.uniform(0.5, 1.5)
-    time.sleep(processing_time)
+    # --- Simulate parsing delay ---
+    time.sleep(random.uniform(0.05, 0.15))
 
     # --- Simulate random failure (low probability) ---
     # ~5% chance of failure
@@ -69,27 +70,93 @@ def process_document(file_path: str, filename: str) -> Dict[str, object]:
             f"Failed to process document '{filename}' due to simulated error"
         )
 
-    # --- Simulated extraction logic ---
-    # These values are intentionally fake but structured
-    pages = random.randint(1, 10)
+    page_count = os.path.getsize(file_path) // SIMULATED_BYTES_PER_PAGE
+    return {"page_count": min(max(page_count, 1), SIMULATED_MAX_PAGES)}
 
-    extracted_text = (
-        f"Simulated extracted text from '{filename}'. "
-        f"This document contains {pages} page(s)."
-    )
+
+def extract_page(
+    file_path: str,
+    filename: str,
+    number: int,
+    page_count: int,
+) -> Dict[str, object]:
+    """
+    Stage 2: extract a single page. Pages are independent, so calls for
+    the same document may run concurrently in separate processes.
+
+    Returns:
+        dict: {"number": int, "text": str, "confidence": float}
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found at path: {file_path}")
+
+    # --- Simulate per-page OCR / inference time ---
+    time.sleep(random.uniform(0.05, 0.15))
+
+    return {
+        "number": number,
+        "text": (
+            f"Simulated extracted text from '{filename}', "
+            f"page {number} of {page_count}."
+        ),
+        # Confidence score (simulated OCR confidence)
+        "confidence": round(random.uniform(0.90, 0.99), 2),
+    }
+
+
+def merge_pages(pages: List[Dict[str, object]]) -> Dict[str, object]:
+    """
+    Stage 3: combine extracted pages (in any order) into the final result:
+        {
+            "language": str,
+            "confidence": float,
+            "pages": [
+                {"number": int, "text": str, "confidence": float},
+                ...
+            ]
+        }
+    """
+    pages = sorted(pages, key=lambda page: page["number"])
 
     # Language detection simulation (simple heuristic)
     language = "en"
 
-    # Confidence score (simulated OCR confidence)
-    confidence = round(random.uniform(0.90, 0.99), 2)
+    confidence = (
+        round(sum(page["confidence"] for page in pages) / len(pages), 2)
+        if pages
+        else 0.0
+    )
 
-    # --- Processing result ---
-    result = {
-        "text": extracted_text,
-        "pages": pages,
+    return {
         "language": language,
         "confidence": confidence,
+        "pages": pages,
     }
 
-    return result
+
+def process_document(file_path: str, filename: str) -> Dict[str, object]:
+    """
+    Simulate processing of a document (OCR / parsing / analysis).
+
+    This function is synchronous and blocking by design.
+    It should be called from the service layer, not directly from API routes.
+
+    Parameters:
+        file_path (str): Absolute or relative path to the file on disk
+        filename (str): Original filename (used for metadata simulation)
+
+    Returns:
+        dict: Structured processing result (see merge_pages)
+
+    Raises:
+        FileNotFoundError:
+            If the file path does not exist
+        DocumentProcessingError:
+            If simulated processing fails
+    """
+    page_count = split_document(file_path, filename)["page_count"]
+    pages = [
+        extract_page(file_path, filename, number, page_count)
+        for number in range(1, page_count + 1)
+    ]
+    return merge_pages(pages)
@@ -0,0 +1,142 @@
+# app/documents/result_cache.py
+
+"""
+Content-addressed cache of processing results.
+
+Entries are keyed by (SHA-256 of the file, PROCESSOR_VERSION). A version
+bump makes every older entry unreachable; purge_stale() deletes them.
+
+The API looks a document up once per processing request; those lookups
+are the hit rate reported in /stats. Workers look again before
+processing (identical content may have completed since the job was
+queued) and count those re-checks, and the entries they store, in their
+own metrics registry.
+"""
+
+import json
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.models import ResultCacheEntry
+from app.documents.processor import PROCESSOR_VERSION
+
+
+class ResultCacheMetrics:
+    """Hits and misses of the API-side lookups."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+result_cache_metrics = ResultCacheMetrics()
+
+
+def _lookup_stmt(content_hash: str):
+    return select(ResultCacheEntry.result).where(
+        ResultCacheEntry.content_hash == content_hash,
+        ResultCacheEntry.processor_version == PROCESSOR_VERSION,
+    )
+
+
+def _decode(raw: Optional[str]) -> Optional[dict]:
+    return json.loads(raw) if raw is not None else None
+
+
+def _outcome(result: Optional[dict]) -> str:
+    return "hit" if result is not None else "miss"
+
+
+class ResultCache:
+    """Sync access, used by job workers."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, content_hash: Optional[str]) -> Optional[dict]:
+        """Re-check before processing; counted apart from the API lookups."""
+        if not settings.RESULT_CACHE_ENABLED or not content_hash:
+            return None
+        result = _decode(self.db.execute(_lookup_stmt(content_hash)).scalar_one_or_none())
+        metrics.result_cache_rechecks.inc(_outcome(result))
+        return result
+
+    def put(self, content_hash: Optional[str], result: dict) -> None:
+        """
+        Store a result; a concurrent insert of the same key is not an error.
+
+        Left for the caller's transaction to commit. Call it after that
+        transaction has written something: the sqlite3 driver only opens a
+        transaction on a write, and a savepoint outside one commits on release.
+        """
+        if not settings.RESULT_CACHE_ENABLED or not content_hash:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.add(
+                    ResultCacheEntry(
+                        content_hash=content_hash,
+                        processor_version=PROCESSOR_VERSION,
+                        result=json.dumps(result),
+                    )
+                )
+        except IntegrityError:
+            pass
+        else:
+            metrics.result_cache_stores.inc()
+
+    def purge_stale(self) -> int:
+        """Delete entries written by other processor versions."""
+        result = self.db.execute(
+            delete(ResultCacheEntry).where(
+                ResultCacheEntry.processor_version != PROCESSOR_VERSION
+            )
+        )
+        self.db.commit()
+        return result.rowcount
+
+
+class AsyncResultCache:
+    """Read access for async API routes."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, content_hash: Optional[str]) -> Optional[dict]:
+        if not settings.RESULT_CACHE_ENABLED or not content_hash:
+            return None
+        result = _decode((await self.db.execute(_lookup_stmt(content_hash))).scalar_one_or_none())
+        result_cache_metrics.record(result is not None)
+        return result
+
+    async def entries(self) -> int:
+        result = await self.db.execute(
+            select(func.count()).select_from(ResultCacheEntry).where(
+                ResultCacheEntry.processor_version == PROCESSOR_VERSION
+            )
+        )
+        return result.scalar_one()
@@ -0,0 +1,223 @@
+# app/documents/results.py
+
+"""
+Page-addressable storage of processing results.
+
+A result is split into a summary row (document_results: language,
+confidence, page count) and one zlib-compressed JSON row per page
+(document_result_pages). Reads select the summary and only the pages in
+the requested range, so the cost of a request is proportional to what
+the client asks for rather than to the size of the document.
+"""
+
+import json
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Document, DocumentResult, DocumentResultPage
+from app.documents.processor import PROCESSOR_VERSION
+from app.documents.search import index_stmts
+
+# "result" is the text of the selected pages, joined; kept under that name
+# so clients of the original plain-text endpoint keep working.
+RESULT_FIELDS = ("result", "language", "confidence", "page_count", "pages")
+DEFAULT_RESULT_FIELDS = ("result", "language", "confidence", "page_count")
+PAGE_FIELDS = frozenset({"result", "pages"})
+
+_PAGE_RANGE = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d*)\s*)?$")
+
+
+class InvalidResultQueryError(Exception):
+    pass
+
+
+# -------------------------
+# Encoding
+# -------------------------
+def compress_page(page: dict) -> bytes:
+    raw = json.dumps(page, separators=(",", ":")).encode()
+    return zlib.compress(raw, settings.RESULT_COMPRESSION_LEVEL)
+
+
+def decompress_page(content: bytes) -> dict:
+    return json.loads(zlib.decompress(content))
+
+
+def store_pages_stmts(document_id: int, pages: List[dict]) -> list:
+    """Statements writing (or overwriting) individual result pages."""
+    if not pages:
+        return []
+    return [
+        delete(DocumentResultPage).where(
+            DocumentResultPage.document_id == document_id,
+            DocumentResultPage.page_number.in_([page["number"] for page in pages]),
+        ),
+        insert(DocumentResultPage).values(
+            [
+                {
+                    "document_id": document_id,
+                    "page_number": page["number"],
+                    "content": compress_page(page),
+                }
+                for page in pages
+            ]
+        ),
+    ]
+
+
+def store_summary_stmts(document_id: int, result: dict) -> list:
+    """
+    Statements writing the summary row once every page is stored, and
+    (re)indexing the text for search in the same transaction.
+    """
+    return [
+        delete(DocumentResult).where(DocumentResult.document_id == document_id),
+        insert(DocumentResult).values(
+            document_id=document_id,
+            processor_version=PROCESSOR_VERSION,
+            language=result.get("language"),
+            confidence=result.get("confidence"),
+            page_count=len(result["pages"]),
+        ),
+        *index_stmts(document_id, result),
+    ]
+
+
+def store_result_stmts(document_id: int, result: dict) -> list:
+    """
+    Statements replacing the whole stored result of a document. Executed by
+    the caller inside the transaction that completes the document.
+    """
+    return [
+        delete(DocumentResultPage).where(DocumentResultPage.document_id == document_id),
+        *store_pages_stmts(document_id, result["pages"]),
+        *store_summary_stmts(document_id, result),
+    ]
+
+
+def stored_pages_stmt(document_id: int):
+    """Pages already persisted for a document, e.g. by an interrupted attempt."""
+    return (
+        select(DocumentResultPage.content)
+        .where(DocumentResultPage.document_id == document_id)
+        .order_by(DocumentResultPage.page_number)
+    )
+
+
+# -------------------------
+# Query parsing
+# -------------------------
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return DEFAULT_RESULT_FIELDS
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in RESULT_FIELDS]
+    if unknown or not selected:
+        raise InvalidResultQueryError(
+            f"Unknown fields: {', '.join(unknown) or '(none)'}. "
+            f"Allowed: {', '.join(RESULT_FIELDS)}"
+        )
+    return selected
+
+
+def parse_page_range(pages: Optional[str]) -> Tuple[int, Optional[int]]:
+    """'10-20', '10-' or '7' -> inclusive (first, last); last None = to the end."""
+    if not pages:
+        return 1, None
+    match = _PAGE_RANGE.match(pages)
+    if match is None:
+        raise InvalidResultQueryError(f"Invalid page range '{pages}'")
+    first = int(match.group(1))
+    if match.group(2) is None:
+        last = first
+    else:
+        last = int(match.group(2)) if match.group(2) else None
+    if first < 1 or (last is not None and last < first):
+        raise InvalidResultQueryError(f"Invalid page range '{pages}'")
+    return first, last
+
+
+# -------------------------
+# Reading
+# -------------------------
+def _project(
+    document_id: int,
+    summary: Dict[str, object],
+    pages: Iterable[dict],
+    fields: Tuple[str, ...],
+) -> Dict[str, object]:
+    out: Dict[str, object] = {"document_id": document_id}
+    pages = list(pages)
+    for field in fields:
+        if field == "result":
+            out["result"] = "\n\n".join(page["text"] for page in pages)
+        elif field == "pages":
+            out["pages"] = pages
+        else:
+            out[field] = summary[field]
+    return out
+
+
+class AsyncResultStore:
+    """Read access to stored results for async API routes."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def read(
+        self,
+        document_id: int,
+        fields: Tuple[str, ...] = DEFAULT_RESULT_FIELDS,
+        first_page: int = 1,
+        last_page: Optional[int] = None,
+    ) -> Dict[str, object]:
+        summary_row = (
+            await self.db.execute(
+                select(
+                    DocumentResult.language,
+                    DocumentResult.confidence,
+                    DocumentResult.page_count,
+                ).where(DocumentResult.document_id == document_id)
+            )
+        ).one_or_none()
+        if summary_row is None:
+            return await self._read_legacy(document_id, fields, first_page, last_page)
+
+        pages: List[dict] = []
+        if PAGE_FIELDS.intersection(fields):
+            stmt = (
+                select(DocumentResultPage.content)
+                .where(
+                    DocumentResultPage.document_id == document_id,
+                    DocumentResultPage.page_number >= first_page,
+                )
+                .order_by(DocumentResultPage.page_number)
+            )
+            if last_page is not None:
+                stmt = stmt.where(DocumentResultPage.page_number <= last_page)
+            rows = await self.db.execute(stmt)
+            pages = [decompress_page(content) for content in rows.scalars()]
+
+        return _project(document_id, summary_row._asdict(), pages, fields)
+
+    async def _read_legacy(
+        self,
+        document_id: int,
+        fields: Tuple[str, ...],
+        first_page: int,
+        last_page: Optional[int],
+    ) -> Dict[str, object]:
+        # Results stored as one plain-text column read as a single page
+        text = await self.db.scalar(
+            select(Document.result).where(Document.id == document_id)
+        )
+        summary = {"language": None, "confidence": None, "page_count": 1}
+        pages: List[dict] = []
+        if text is not None and first_page == 1:
+            pages = [{"number": 1, "text": text, "confidence": None}]
+        return _project(document_id, summary, pages, fields)
@@ -0,0 +1,369 @@
+# app/documents/resumable.py
+
+"""
+Resumable uploads.
+
+    POST   /documents/uploads                  create a session
+    PUT    /documents/uploads/{id}?offset=N    append a chunk at offset N
+    GET    /documents/uploads/{id}             current offset
+    POST   /documents/uploads/{id}/complete    create the Document
+    DELETE /documents/uploads/{id}             abort
+
+Chunks are appended to a staging file named after the session. The
+staging file's size is the authoritative offset: a chunk is only accepted
+at exactly that offset, and whatever part of an interrupted chunk arrived
+is kept, so the client resumes from the offset it reads back.
+
+Writers take an exclusive, non-blocking flock on the staging file, so two
+requests can never append to the same session at once (the second gets
+UploadBusyError), while different sessions are written in parallel.
+
+The SHA-256 is computed incrementally as chunks are written. The running
+digest lives in memory of the process that wrote the last chunk; a
+process that finds its digest behind the file (after a restart, or when
+chunks were spread across API processes) rehashes the staging file once.
+
+Sessions expire UPLOAD_SESSION_TTL_SECONDS after their last chunk; job
+workers delete expired sessions and their staging files.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import os
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.base import utcnow
+from app.db.models import Document, UploadSession
+from app.documents.service import AsyncDocumentService
+from app.storage.backends import get_storage
+from app.storage.base import StorageBackend, StoredFile
+
+logger = get_logger("uploads")
+
+
+class UploadSessionNotFoundError(Exception):
+    pass
+
+
+class UploadBusyError(Exception):
+    pass
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class UploadIncompleteError(Exception):
+    pass
+
+
+class UploadChecksumMismatchError(Exception):
+    pass
+
+
+class UploadOffsetMismatchError(Exception):
+    """The chunk does not start where the staged data ends."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+def staging_path(upload_id: str) -> Path:
+    return Path(settings.UPLOAD_STAGING_DIR) / f"{upload_id}.part"
+
+
+# -------------------------
+# Incremental digests
+# -------------------------
+# upload_id -> (bytes hashed, running digest)
+_digests: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+_digests_lock = threading.Lock()
+
+
+def _digest_at(upload_id: str, f, size: int) -> "hashlib._Hash":
+    """Running digest of the first `size` bytes; rehashes if ours is stale."""
+    with _digests_lock:
+        hashed, digest = _digests.get(upload_id, (None, None))
+    if hashed == size:
+        # A copy: the cached digest stays valid if this write fails
+        return digest.copy()
+
+    digest = hashlib.sha256()
+    f.seek(0)
+    remaining = size
+    while remaining:
+        chunk = f.read(min(settings.UPLOAD_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        digest.update(chunk)
+        remaining -= len(chunk)
+    f.seek(size)
+    return digest
+
+
+def _forget_digest(upload_id: str) -> None:
+    with _digests_lock:
+        _digests.pop(upload_id, None)
+
+
+class _StagingWriter:
+    """
+    Exclusive append handle on a staging file, checked against the
+    offset the client claims to write at. Blocking; used from threads.
+    """
+
+    def __init__(self, upload_id: str, offset: Optional[int]):
+        self.upload_id = upload_id
+        # The file is closed (releasing the lock) if any check fails
+        with contextlib.ExitStack() as stack:
+            try:
+                self._file = stack.enter_context(open(staging_path(upload_id), "r+b"))
+            except FileNotFoundError:
+                raise UploadSessionNotFoundError()
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadBusyError()
+            # Completing (or aborting) unlinks the file under the lock; a
+            # writer that opened it just before must not append to it, as
+            # a completed upload's file is the stored document
+            try:
+                current = os.stat(staging_path(upload_id))
+            except FileNotFoundError:
+                raise UploadSessionNotFoundError()
+            if not os.path.samestat(current, os.fstat(self._file.fileno())):
+                raise UploadSessionNotFoundError()
+
+            self.size = os.fstat(self._file.fileno()).st_size
+            if offset is not None and offset != self.size:
+                raise UploadOffsetMismatchError(self.size)
+            self._digest = _digest_at(upload_id, self._file, self.size)
+            self._file.seek(self.size)
+            # Otherwise it stays open until close() or release()
+            self._open = stack.pop_all()
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def close(self) -> int:
+        """Flush to disk, remember the digest and release the lock."""
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            with _digests_lock:
+                _digests[self.upload_id] = (self.size, self._digest)
+        finally:
+            self._open.close()
+        return self.size
+
+    def release(self) -> None:
+        self._open.close()
+
+
+def _staged_size(upload_id: str) -> int:
+    try:
+        return staging_path(upload_id).stat().st_size
+    except FileNotFoundError:
+        raise UploadSessionNotFoundError()
+
+
+def _create_staging_file(upload_id: str) -> None:
+    path = staging_path(upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch(exist_ok=False)
+
+
+def _remove_staging_file(upload_id: str) -> None:
+    staging_path(upload_id).unlink(missing_ok=True)
+    _forget_digest(upload_id)
+
+
+def _store_staged(
+    storage: StorageBackend,
+    writer: _StagingWriter,
+    filename: str,
+    size: Optional[int],
+    sha256: Optional[str],
+) -> StoredFile:
+    """Check the locked staging file is whole and store it; the staging file stays."""
+    if size is not None and writer.size != size:
+        raise UploadIncompleteError(f"Received {writer.size} of {size} bytes")
+    digest = writer.sha256()
+    if sha256 is not None and sha256.lower() != digest:
+        raise UploadChecksumMismatchError(f"SHA-256 of the upload is {digest}")
+    return storage.save_staged(filename, staging_path(writer.upload_id), writer.size, digest)
+
+
+def _expires_at():
+    return utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def _session_stmt(upload_id: str, user_id: int):
+    return select(UploadSession).where(
+        UploadSession.id == upload_id,
+        UploadSession.user_id == user_id,
+        UploadSession.expires_at > utcnow(),
+    )
+
+
+class ResumableUploadService:
+    """
+    Resumable upload sessions for async API routes.
+    Blocking file work runs in worker threads. No FastAPI dependencies.
+    """
+
+    def __init__(self, db: AsyncSession, storage: StorageBackend | None = None):
+        self.db = db
+        self.storage = storage or get_storage()
+
+    async def create(self, *, user_id: int, filename: str, size: Optional[int]) -> UploadSession:
+        """Raises ValueError for a disallowed file type, UploadTooLargeError past the limit."""
+        self.storage._validate_extension(filename)
+        if size is not None and size > settings.UPLOAD_SESSION_MAX_BYTES:
+            raise UploadTooLargeError(
+                f"Uploads are limited to {settings.UPLOAD_SESSION_MAX_BYTES} bytes"
+            )
+
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            filename=filename,
+            size=size,
+            offset=0,
+            expires_at=_expires_at(),
+        )
+        await asyncio.to_thread(_create_staging_file, session.id)
+        self.db.add(session)
+        try:
+            await self.db.commit()
+        except Exception:
+            await asyncio.to_thread(_remove_staging_file, session.id)
+            raise
+        return session
+
+    async def get(self, upload_id: str, user_id: int) -> UploadSession:
+        """The session with offset read from the staging file."""
+        result = await self.db.execute(_session_stmt(upload_id, user_id))
+        session = result.scalar_one_or_none()
+        if session is None:
+            raise UploadSessionNotFoundError()
+        session.offset = await asyncio.to_thread(_staged_size, upload_id)
+        return session
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        user_id: int,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+    ) -> UploadSession:
+        """
+        Append a streamed chunk at `offset`. Bytes are buffered up to
+        UPLOAD_CHUNK_SIZE and written from a thread. If the stream breaks
+        off, the bytes received so far are kept and the session reflects
+        them.
+        """
+        result = await self.db.execute(_session_stmt(upload_id, user_id))
+        session = result.scalar_one_or_none()
+        if session is None:
+            raise UploadSessionNotFoundError()
+        limit = min(
+            session.size if session.size is not None else settings.UPLOAD_SESSION_MAX_BYTES,
+            settings.UPLOAD_SESSION_MAX_BYTES,
+        )
+        # No connection is held while the chunk streams in
+        await self.db.commit()
+
+        writer = await asyncio.to_thread(_StagingWriter, upload_id, offset)
+        try:
+            buffer = bytearray()
+            async for piece in chunks:
+                if writer.size + len(buffer) + len(piece) > limit:
+                    raise UploadTooLargeError(f"Upload would exceed {limit} bytes")
+                buffer += piece
+                if len(buffer) >= settings.UPLOAD_CHUNK_SIZE:
+                    await asyncio.to_thread(writer.write, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(writer.write, bytes(buffer))
+        finally:
+            new_offset = await asyncio.to_thread(writer.close)
+            await self.db.execute(
+                update(UploadSession)
+                .where(UploadSession.id == upload_id)
+                .values(offset=new_offset, expires_at=_expires_at())
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+
+        session.offset = new_offset
+        return session
+
+    async def complete(
+        self, upload_id: str, user_id: int, sha256: Optional[str] = None
+    ) -> Document:
+        """
+        Store the staged file and record it as a Document, deleting the
+        session in the same transaction. The staging file is only removed
+        once that has committed; if the commit fails, the stored file is
+        removed again and the session can still be resumed or completed.
+        """
+        session = await self.get(upload_id, user_id)
+        # Held until the end, so no chunk can be appended meanwhile
+        writer = await asyncio.to_thread(_StagingWriter, upload_id, None)
+        try:
+            stored = await asyncio.to_thread(
+                _store_staged, self.storage, writer, session.filename, session.size, sha256
+            )
+            await self.db.delete(session)
+            document = await AsyncDocumentService(self.db, self.storage).create_document(
+                user_id=user_id, filename=session.filename, stored=stored
+            )
+            await asyncio.to_thread(_remove_staging_file, upload_id)
+        finally:
+            writer.release()
+        return document
+
+    async def abort(self, upload_id: str, user_id: int) -> None:
+        result = await self.db.execute(_session_stmt(upload_id, user_id))
+        session = result.scalar_one_or_none()
+        if session is None:
+            raise UploadSessionNotFoundError()
+        await self.db.delete(session)
+        await self.db.commit()
+        await asyncio.to_thread(_remove_staging_file, upload_id)
+
+
+def expire_upload_sessions(db: Session) -> int:
+    """Delete expired sessions and their staging files (run by workers)."""
+    expired: List[str] = list(
+        db.execute(
+            select(UploadSession.id).where(UploadSession.expires_at <= utcnow())
+        ).scalars()
+    )
+    if not expired:
+        return 0
+    db.execute(delete(UploadSession).where(UploadSession.id.in_(expired)))
+    db.commit()
+    for upload_id in expired:
+        _remove_staging_file(upload_id)
+    logger.info("upload_sessions_expired", extra={"extra": {"sessions": len(expired)}})
+    return len(expired)
@@ -1,27 +1,54 @@
 # app/documents/router.py
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from datetime import datetime
+from typing import List, Optional
 
-from app.documents.schemas import DocumentOut,DocumentStatusOut
-from app.documents.service import DocumentService,DocumentNotFoundError
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.documents import states
+from app.documents.batch import ALLOWED_TYPES, BatchUploadError, UploadPart
+from app.documents.downloads import document_file_response
+from app.documents.events import status_hub
+from app.documents.listing import render_document_page
+from app.documents.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError
+from app.documents.results import AsyncResultStore, InvalidResultQueryError, parse_fields, parse_page_range
+from app.documents.search import AsyncSearchService, InvalidSearchQueryError, SearchUnavailableError
+from app.documents.resumable import (
+    ResumableUploadService,
+    UploadBusyError,
+    UploadChecksumMismatchError,
+    UploadIncompleteError,
+    UploadOffsetMismatchError,
+    UploadSessionNotFoundError,
+    UploadTooLargeError,
+)
+from app.documents.schemas import (
+    BatchUploadOut,
+    DocumentOut,
+    DocumentPage,
+    DocumentResultOut,
+    DocumentStatusOut,
+    SearchPage,
+    UploadSessionCreate,
+    UploadSessionOut,
+)
+from app.documents.service import AsyncDocumentService,DocumentNotFoundError
+from app.jobs.queue import QueueFullError
+from app.jobs.scheduler import BATCH, DEFAULT_PRIORITY, UnknownPriorityError
+from app.core.config import settings
+from app.db.session import get_async_db
 from app.core.security import get_current_user
-from app.db.session import SessionLocal
-from app.db.models import Document
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-ALLOWED_TYPES = {
-    "application/pdf",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-}
-
-
 @router.post("/upload", response_model=DocumentOut, status_code=201)
 async def upload_document(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     if file.content_type not in ALLOWED_TYPES:
@@ -30,111 +57,449 @@ async def upload_document(
             detail="Only PDF and DOCX files are allowed",
         )
 
-    service = DocumentService(db=db)
-
-    file_bytes = await file.read()
+    service = AsyncDocumentService(db=db)
 
-    document = service.upload_document(
+    # The service copies the spooled upload to storage in chunks on a
+    # worker thread, so the event loop never blocks on file I/O.
+    document = await service.upload_document(
     user_id=current_user.id,
     filename=file.filename,
-    file_bytes=file_bytes,
+    file=file.file,
 )
 
     return document
 
 
+@router.post("/upload/batch", response_model=BatchUploadOut, status_code=201)
+async def upload_documents_batch(
+    response: Response,
+    files: List[UploadFile] = File(...),
+    process: bool = Query(False, description="Also queue processing for every uploaded file"),
+    priority: str = Query(BATCH, description="Scheduling priority of the processing jobs"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Upload many PDF/DOCX files, or ZIP archives of them, in one request.
+    All documents are recorded in one transaction; files that cannot be
+    stored are reported per item (207 when some failed).
+    """
+    service = AsyncDocumentService(db=db)
+    parts = [UploadPart(f.filename or "upload", f.content_type, f.file) for f in files]
+
+    try:
+        items, processing_error = await service.upload_batch(
+            user_id=current_user.id, parts=parts, process=process, priority=priority
+        )
+    except (BatchUploadError, UnknownPriorityError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    failed = sum(1 for _, document in items if document is None)
+    if failed:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return {
+        "items": [
+            {"filename": item.filename, "document": document, "error": item.error}
+            for item, document in items
+        ],
+        "uploaded": len(items) - failed,
+        "failed": failed,
+        "processing_error": processing_error,
+    }
+
+
+# -------------------------
+# Resumable uploads
+# -------------------------
+def _upload_session_out(session) -> dict:
+    return {
+        "upload_id": session.id,
+        "filename": session.filename,
+        "offset": session.offset,
+        "size": session.size,
+        "expires_at": session.expires_at,
+    }
+
+
+def _upload_headers(offset: int) -> dict:
+    return {"Upload-Offset": str(offset)}
+
+
+@router.post("/uploads", response_model=UploadSessionOut, status_code=201)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Start a resumable upload. Send the bytes with PUT /uploads/{upload_id}
+    in as many chunks as needed, then POST /uploads/{upload_id}/complete.
+    """
+    uploads = ResumableUploadService(db=db)
+    try:
+        session = await uploads.create(
+            user_id=current_user.id, filename=body.filename, size=body.size
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(exc))
+    return _upload_session_out(session)
+
+
+@router.api_route("/uploads/{upload_id}", methods=["GET", "HEAD"], response_model=UploadSessionOut)
+async def get_upload_session(
+    upload_id: str,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """Where to resume: offset is the number of bytes stored so far."""
+    uploads = ResumableUploadService(db=db)
+    try:
+        session = await uploads.get(upload_id, current_user.id)
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    response.headers.update(_upload_headers(session.offset))
+    return _upload_session_out(session)
+
 
-@router.get("", response_model=list[DocumentOut])
-def list_documents(
-    db: Session = Depends(get_db),
+@router.put("/uploads/{upload_id}", response_model=UploadSessionOut)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk; must equal the session offset"),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    service = DocumentService(db=db)
-    return service.list_documents_for_user(user_id=current_user.id)
+    """
+    Append the request body at `offset`. On 409 the detail and the
+    Upload-Offset header give the offset to resume from.
+    """
+    uploads = ResumableUploadService(db=db)
+    try:
+        session = await uploads.write_chunk(
+            upload_id, current_user.id, offset, request.stream()
+        )
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadOffsetMismatchError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+            headers=_upload_headers(exc.offset),
+        )
+    except UploadBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another chunk of this upload is being written",
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(exc))
+    return _upload_session_out(session)
 
-def process_document_background(document_id: int):
-    db = SessionLocal()
+
+@router.post("/uploads/{upload_id}/complete", response_model=DocumentOut, status_code=201)
+async def complete_upload(
+    upload_id: str,
+    sha256: Optional[str] = Query(None, description="Expected SHA-256 of the whole file"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """Create the document from a fully uploaded session."""
+    uploads = ResumableUploadService(db=db)
     try:
-        service = DocumentService(db=db)
-        document = (
-            db.query(Document)
-            .filter(Document.id == document_id)
-            .first()
+        return await uploads.complete(upload_id, current_user.id, sha256)
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    except UploadBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A chunk of this upload is still being written",
         )
-        if document:
-            service.process_document(document)
-    finally:
-        db.close()
+    except UploadIncompleteError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except UploadChecksumMismatchError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
 
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload(
+    upload_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    uploads = ResumableUploadService(db=db)
+    try:
+        await uploads.abort(upload_id, current_user.id)
+    except UploadSessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(status_code=204)
+
+
+@router.get("", response_model=DocumentPage)
+async def list_documents(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    if status_filter is not None and status_filter not in states.TRANSITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown status '{status_filter}'",
+        )
+
+    service = AsyncDocumentService(db=db)
+    try:
+        rows, next_cursor = await service.list_document_rows_for_user(
+            user_id=current_user.id,
+            limit=limit,
+            cursor=cursor,
+            status=status_filter,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # Serialized in one pass from plain rows; DocumentPage documents the
+    # shape but is not instantiated per request
+    return Response(
+        content=render_document_page(rows, next_cursor), media_type="application/json"
+    )
+
+
+@router.get("/search", response_model=SearchPage)
+async def search_documents(
+    q: str = Query(..., min_length=1, max_length=512, description='Words or "phrases"; word* matches a prefix'),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Full-text search over the user's processed documents, best match
+    first. Pass next_cursor back as ?cursor= with the same q.
+    """
+    try:
+        items, next_cursor = await AsyncSearchService(db).search(
+            current_user.id, q, limit=limit, cursor=cursor
+        )
+    except InvalidSearchQueryError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except InvalidCursorError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    except SearchUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search is not available on this database",
+        )
+
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.post("/{document_id}/process", status_code=202)
-def process_document(
+async def process_document(
     document_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    priority: str = Query(
+        DEFAULT_PRIORITY, description="Scheduling priority: interactive, normal or batch"
+    ),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    service = DocumentService(db=db)
+    service = AsyncDocumentService(db=db)
 
     try:
-        document = service.get_document(document_id=document_id, user_id=current_user.id)
+        document = await service.get_document(document_id=document_id, user_id=current_user.id)
     except DocumentNotFoundError:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if document.status in ("PROCESSING", "COMPLETED"):
-        return {"document_id": document.id, "status": document.status}
-
-    # Immediately mark as PROCESSING
-    document.status = "PROCESSING"
-    db.commit()
-
-    # Run async processing in the background
-    background_tasks.add_task(
-    process_document_background,
-    document.id
-)
+    # Atomically claim UPLOADED/FAILED -> PROCESSING and hand off to the
+    # job queue; a worker process (python -m app.jobs.worker) picks it up.
+    # If the claim loses (already PROCESSING/COMPLETED), report the
+    # current status instead of queueing duplicate work. Workers pick jobs
+    # fair-share across users, weighted by priority (app.jobs.scheduler).
+    try:
+        await service.request_processing(document, priority=priority)
+    except UnknownPriorityError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except QueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Processing queue is full, retry later",
+            headers={"Retry-After": str(settings.PROCESSING_RETRY_AFTER_SECONDS)},
+        )
 
-    return {"document_id": document.id, "status": "PROCESSING"}
+    return {"document_id": document.id, "status": document.status}
 
 # -------------------------
 # Status endpoint
 # -------------------------
 @router.get("/{document_id}/status", response_model=DocumentStatusOut)
-def get_document_status(
+async def get_document_status(
     document_id: int,
-    db: Session = Depends(get_db),
+    wait: int = Query(0, ge=0, le=settings.STATUS_LONG_POLL_MAX_SECONDS),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    service = DocumentService(db=db)
+    """
+    Current status of a document.
+    With ?wait=N (seconds) the request long-polls: it returns as soon as
+    the status changes, or with the unchanged status after N seconds.
+    """
+    service = AsyncDocumentService(db=db)
 
     try:
-        document = service.get_document(document_id=document_id, user_id=current_user.id)
+        document = await service.get_document(document_id=document_id, user_id=current_user.id)
     except DocumentNotFoundError:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    return {"document_id": document.id, "status": document.status}
+    current_status = document.status
+    if wait and current_status not in states.TERMINAL_STATUSES:
+        # Give the connection back to the pool while we wait
+        await db.close()
+        new_status = await status_hub.wait_for_change(document_id, current_status, wait)
+        if new_status != current_status:
+            # Re-read so progress matches the new status
+            document = await service.get_document(document_id=document_id, user_id=current_user.id)
+
+    return {
+        "document_id": document_id,
+        "status": document.status,
+        "progress": _progress(document),
+    }
+
+
+def _progress(document) -> Optional[dict]:
+    if document.pages_total is None:
+        return None
+    return {"pages_done": document.pages_done or 0, "pages_total": document.pages_total}
+
+
+@router.get("/{document_id}/events")
+async def stream_document_events(
+    document_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Server-Sent Events stream of status changes.
+    Emits the current status first and closes after a terminal status.
+    """
+    service = AsyncDocumentService(db=db)
+
+    try:
+        document = await service.get_document(document_id=document_id, user_id=current_user.id)
+    except DocumentNotFoundError:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    initial_status = document.status
+    await db.close()
+
+    def sse(status_value: str) -> str:
+        payload = json.dumps({"document_id": document_id, "status": status_value})
+        return f"event: status\ndata: {payload}\n\n"
+
+    async def event_stream():
+        yield sse(initial_status)
+        if initial_status in states.TERMINAL_STATUSES:
+            return
+
+        async with status_hub.subscribe(document_id, initial_status) as queue:
+            while not await request.is_disconnected():
+                try:
+                    new_status = await asyncio.wait_for(
+                        queue.get(), settings.STATUS_SSE_KEEPALIVE_SECONDS
+                    )
+                except TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield sse(new_status)
+                if new_status in states.TERMINAL_STATUSES:
+                    return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------------
+# Original file endpoint
+# -------------------------
+@router.api_route("/{document_id}/file", methods=["GET", "HEAD"])
+async def download_document_file(
+    document_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    The original upload, served straight from storage.
+    Supports Range requests and If-None-Match revalidation (304).
+    """
+    service = AsyncDocumentService(db=db)
+
+    try:
+        document = await service.get_document(document_id=document_id, user_id=current_user.id)
+    except DocumentNotFoundError:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # Nothing below needs the database
+    await db.close()
+
+    try:
+        return await document_file_response(request, document, service.storage)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found in storage")
 
 
 # -------------------------
 # Result endpoint
 # -------------------------
-@router.get("/{document_id}/result")
-def get_document_result(
+@router.get(
+    "/{document_id}/result",
+    response_model=DocumentResultOut,
+    response_model_exclude_unset=True,
+)
+async def get_document_result(
     document_id: int,
-    db: Session = Depends(get_db),
+    pages: Optional[str] = Query(None, description="Page range, e.g. 10-20, 10- or 7"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated: result, language, confidence, page_count, pages"
+    ),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    service = DocumentService(db=db)
+    """
+    Processing result of a completed document.
+    Only the requested pages are loaded and decompressed.
+    """
+    try:
+        selected_fields = parse_fields(fields)
+        first_page, last_page = parse_page_range(pages)
+    except InvalidResultQueryError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    service = AsyncDocumentService(db=db)
 
     try:
-        document = service.get_document(document_id=document_id, user_id=current_user.id)
+        document = await service.get_document(document_id=document_id, user_id=current_user.id)
     except DocumentNotFoundError:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if document.status != "COMPLETED":
+    if document.status != states.COMPLETED:
         raise HTTPException(
             status_code=400,
             detail=f"Document not ready. Current status: {document.status}"
         )
 
-    return {"document_id": document.id, "result": document.result}
+    return await AsyncResultStore(db).read(
+        document.id, selected_fields, first_page, last_page
+    )
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # -------------------------
@@ -29,12 +29,85 @@ class DocumentOut(DocumentBase):
     pass
 
 
+# -------------------------
+# Response: paginated listing
+# -------------------------
+class DocumentPage(BaseModel):
+    """
+    One page of a user's documents, newest first.
+    Pass next_cursor back as ?cursor= to fetch the following page.
+    """
+    items: list[DocumentOut]
+    next_cursor: Optional[str] = None
+
+
+# -------------------------
+# Response: search
+# -------------------------
+class SearchHitOut(BaseModel):
+    id: int
+    filename: str
+    status: str
+    created_at: datetime
+    # Higher is more relevant (negated bm25)
+    score: float
+    # Matching excerpt, matched terms wrapped in **
+    snippet: str
+
+
+class SearchPage(BaseModel):
+    items: list[SearchHitOut]
+    next_cursor: Optional[str] = None
+
+
+# -------------------------
+# Response: batch upload
+# -------------------------
+class BatchItemOut(BaseModel):
+    """One file of the batch: the created document, or why it was rejected."""
+    filename: str
+    document: Optional[DocumentOut] = None
+    error: Optional[str] = None
+
+
+class BatchUploadOut(BaseModel):
+    items: list[BatchItemOut]
+    uploaded: int
+    failed: int
+    # Set when processing was requested but could not be queued
+    processing_error: Optional[str] = None
+
+
+# -------------------------
+# Resumable uploads
+# -------------------------
+class UploadSessionCreate(BaseModel):
+    filename: str
+    # Total length in bytes, if known; completion then requires exactly this many
+    size: Optional[int] = Field(None, ge=0)
+
+
+class UploadSessionOut(BaseModel):
+    upload_id: str
+    filename: str
+    offset: int
+    size: Optional[int] = None
+    expires_at: datetime
+
+
 # -------------------------
 # Response: status endpoint
 # -------------------------
+class ProgressOut(BaseModel):
+    pages_done: int
+    pages_total: int
+
+
 class DocumentStatusOut(BaseModel):
     document_id: int
     status: str
+    # Present once processing has determined the page count
+    progress: Optional[ProgressOut] = None
 
     class Config:
         orm_mode = True
@@ -43,10 +116,20 @@ class DocumentStatusOut(BaseModel):
 # -------------------------
 # Response: result endpoint
 # -------------------------
-class DocumentResultOut(BaseModel):
-    id: int
-    status: str
-    result: Optional[str]
+class ResultPageOut(BaseModel):
+    number: int
+    text: str
+    confidence: Optional[float] = None
 
-    class Config:
-        from_attributes = True
+
+class DocumentResultOut(BaseModel):
+    """
+    Only the fields selected with ?fields= are present; result and pages
+    cover the pages selected with ?pages=.
+    """
+    document_id: int
+    result: Optional[str] = None
+    language: Optional[str] = None
+    confidence: Optional[float] = None
+    page_count: Optional[int] = None
+    pages: Optional[list[ResultPageOut]] = None
@@ -0,0 +1,292 @@
+# app/documents/search.py
+
+"""
+Full-text search over processing results (SQLite FTS5).
+
+document_search holds one row per completed document (rowid = document
+id) with the text of all its pages and an `owner` token ("u<user_id>").
+Queries always AND the caller's owner token into the MATCH expression, so
+per-user scoping is answered by the index itself instead of by filtering
+other users' hits afterwards.
+
+The index is written in the same transaction as the result summary (see
+results.store_summary_stmts), so it never disagrees with the stored
+results. It is created, and backfilled from stored results, on startup;
+search_index_state records how far the backfill got, so a restart
+resumes it instead of leaving the index partly filled.
+
+Results are ordered by bm25 rank, then document id, and paginated with
+a keyset cursor on that pair. Ranks shift as documents are indexed, so a
+page boundary can move slightly between requests while documents are
+being completed.
+
+Search needs SQLite with FTS5; on other databases the index statements
+are skipped and the endpoint reports search as unavailable.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.base import utcnow
+from app.documents.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor
+
+logger = get_logger("search")
+
+SEARCH_TABLE = "document_search"
+SNIPPET_TOKENS = 16
+# Pages are indexed in batches of this many documents while backfilling
+BACKFILL_BATCH = 500
+# The single search_index_state row
+_STATE_ID = 1
+
+# Double-quoted phrases, or bare words with an optional trailing * (prefix)
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+_enabled = make_url(settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+
+class SearchUnavailableError(Exception):
+    pass
+
+
+class InvalidSearchQueryError(Exception):
+    pass
+
+
+def search_enabled() -> bool:
+    return _enabled
+
+
+# -------------------------
+# Index maintenance
+# -------------------------
+def index_stmts(document_id: int, result: dict) -> list:
+    """
+    Statements (re)indexing a document's result text. Executed in the
+    transaction that stores the result summary; empty without FTS5.
+    """
+    if not _enabled:
+        return []
+    content = "\n\n".join(page["text"] for page in result["pages"])
+    return [
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :document_id").bindparams(
+            document_id=document_id
+        ),
+        text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, content, owner) "
+            "SELECT id, :content, 'u' || user_id FROM documents WHERE id = :document_id"
+        ).bindparams(document_id=document_id, content=content),
+    ]
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Create the FTS5 table if missing and backfill it from stored results,
+    resuming an interrupted backfill. Disables search when SQLite lacks FTS5.
+
+    The API and workers run this concurrently on startup. Creation is
+    IF NOT EXISTS and every backfill batch is idempotent, so processes
+    backfilling at the same time is harmless.
+    """
+    global _enabled
+    if not _enabled:
+        return
+
+    # Imported here: results imports this module for index_stmts
+    from app.documents.results import decompress_page
+
+    with engine.begin() as conn:
+        try:
+            conn.execute(
+                text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                    "content, owner, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+            )
+        except OperationalError as exc:
+            if "no such module: fts5" not in str(exc):
+                raise
+            _enabled = False
+            logger.warning("search_unavailable", extra={"extra": {"error": str(exc)}})
+            return
+        # Rank by the text only; the owner token is a filter, not a signal
+        conn.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(1.0, 0.0)')")
+        )
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO search_index_state (id, backfilled_through) "
+                "VALUES (:id, 0)"
+            ),
+            {"id": _STATE_ID},
+        )
+        last_id, completed_at = conn.execute(
+            text("SELECT backfilled_through, completed_at FROM search_index_state WHERE id = :id"),
+            {"id": _STATE_ID},
+        ).one()
+    if completed_at is not None:
+        return
+
+    resumed_from = last_id
+    indexed = 0
+    while True:
+        with engine.begin() as conn:
+            ids = list(
+                conn.execute(
+                    text(
+                        "SELECT document_id FROM document_results WHERE document_id > :last_id "
+                        "ORDER BY document_id LIMIT :batch"
+                    ),
+                    {"last_id": last_id, "batch": BACKFILL_BATCH},
+                ).scalars()
+            )
+            if not ids:
+                break
+            pages: Dict[int, List[dict]] = {document_id: [] for document_id in ids}
+            for document_id, content in conn.execute(
+                text(
+                    "SELECT document_id, content FROM document_result_pages "
+                    "WHERE document_id >= :first AND document_id <= :last "
+                    "ORDER BY document_id, page_number"
+                ),
+                {"first": ids[0], "last": ids[-1]},
+            ):
+                if document_id in pages:
+                    pages[document_id].append(decompress_page(content))
+            for document_id, document_pages in pages.items():
+                for stmt in index_stmts(document_id, {"pages": document_pages}):
+                    conn.execute(stmt)
+            indexed += len(ids)
+            last_id = ids[-1]
+            # Progress commits with the batch it covers
+            conn.execute(
+                text(
+                    "UPDATE search_index_state "
+                    "SET backfilled_through = MAX(backfilled_through, :last_id) WHERE id = :id"
+                ),
+                {"last_id": last_id, "id": _STATE_ID},
+            )
+
+    # Results stored as plain text before they were split into pages
+    with engine.begin() as conn:
+        legacy = conn.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, content, owner) "
+                "SELECT id, result, 'u' || user_id FROM documents "
+                "WHERE result IS NOT NULL "
+                "AND id NOT IN (SELECT document_id FROM document_results) "
+                f"AND id NOT IN (SELECT rowid FROM {SEARCH_TABLE})"
+            )
+        ).rowcount
+        conn.execute(
+            text("UPDATE search_index_state SET completed_at = :now WHERE id = :id").bindparams(
+                bindparam("now", utcnow(), type_=DateTime(timezone=True)), id=_STATE_ID
+            )
+        )
+    logger.info(
+        "search_index_built",
+        extra={"extra": {"documents": indexed + max(legacy, 0), "resumed_from": resumed_from}},
+    )
+
+
+# -------------------------
+# Querying
+# -------------------------
+def build_match_query(q: str, user_id: int) -> str:
+    """
+    Turn free text into a safe FTS5 expression: every word or "quoted
+    phrase" must match (word* matches a prefix); FTS5 operators typed by
+    the user are treated as plain words.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(q):
+        prefix = False
+        if word:
+            prefix = word.endswith("*")
+            phrase = word.rstrip("*")
+        if not phrase.strip():
+            continue
+        terms.append('"' + phrase.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        raise InvalidSearchQueryError("Search query has no terms")
+    return f'owner : "u{user_id}" AND content : ({" ".join(terms)})'
+
+
+def _search_stmt(with_cursor: bool):
+    # FTS5 functions and MATCH need the table name itself, not an alias
+    t = SEARCH_TABLE
+    keyset = (
+        f"AND ({t}.rank > :last_rank OR ({t}.rank = :last_rank AND {t}.rowid > :last_id)) "
+        if with_cursor
+        else ""
+    )
+    return text(
+        f"SELECT d.id, d.filename, d.status, d.created_at, {t}.rank AS rank, "
+        f"snippet({t}, 0, '**', '**', '…', {SNIPPET_TOKENS}) AS snippet "
+        f"FROM {t} JOIN documents AS d ON d.id = {t}.rowid "
+        f"WHERE {t} MATCH :match AND d.user_id = :user_id "
+        f"{keyset}"
+        f"ORDER BY {t}.rank, {t}.rowid LIMIT :limit"
+    ).columns(
+        id=Integer,
+        filename=String,
+        status=String,
+        created_at=DateTime(timezone=True),
+        rank=Float,
+        snippet=String,
+    )
+
+
+class AsyncSearchService:
+    """Search for async API routes. No FastAPI dependencies."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(
+        self,
+        user_id: int,
+        q: str,
+        *,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of the user's documents matching q, best match first,
+        and the cursor of the next page (None on the last page).
+        """
+        if not _enabled:
+            raise SearchUnavailableError()
+
+        params = {"match": build_match_query(q, user_id), "user_id": user_id, "limit": limit + 1}
+        if cursor is not None:
+            last_rank, last_id = decode_cursor(cursor, 2)
+            if not isinstance(last_rank, (int, float)) or not isinstance(last_id, int):
+                raise InvalidCursorError("Malformed cursor")
+            params.update(last_rank=last_rank, last_id=last_id)
+
+        rows = (await self.db.execute(_search_stmt(cursor is not None), params)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+
+        return [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "status": row.status,
+                "created_at": row.created_at,
+                # bm25 is lower-is-better; flip it so higher means more relevant
+                "score": -row.rank,
+                "snippet": row.snippet,
+            }
+            for row in rows
+        ], next_cursor
@@ -1,11 +1,40 @@
 # app/documents/service.py
 
+import asyncio
 import time
-from typing import List
+from datetime import datetime
+from typing import BinaryIO, List, Optional, Tuple
+from sqlalchemy import Select, and_, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db.models import Document
-from app.storage.file_storage import LocalFileStorage
+from app.documents import states
+from app.documents.batch import StagedItem, UploadPart, discard_staged, stage_batch
+from app.documents.pagination import (
+    DEFAULT_PAGE_SIZE,
+    InvalidCursorError,
+    as_utc_naive,
+    decode_cursor,
+    encode_cursor,
+)
+from app.documents.events import status_hub
+from app.documents.listing import LIST_COLUMNS
+from app.documents.result_cache import AsyncResultCache, ResultCache
+from app.documents.pipeline import ProcessingPipeline
+from app.documents.results import (
+    decompress_page,
+    store_pages_stmts,
+    store_result_stmts,
+    store_summary_stmts,
+    stored_pages_stmt,
+)
+from app.documents.executor import ProcessingExecutor, get_processing_executor
+from app.jobs import scheduler
+from app.jobs.queue import AsyncJobQueue, QueueFullError
+from app.storage.backends import get_storage
+from app.storage.base import StorageBackend, StoredFile
+from app.core import metrics
 from app.core.logging import get_logger
 
 logger = get_logger("document")
@@ -15,107 +44,567 @@ class DocumentNotFoundError(Exception):
     pass
 
 
+# -------------------------
+# Statement builders
+# Shared by the sync (worker) and async (API) services so both
+# run exactly the same SQL.
+# -------------------------
+def _get_document_stmt(document_id: int, user_id: int | None) -> Select:
+    stmt = select(Document).where(Document.id == document_id)
+    if user_id is not None:
+        stmt = stmt.where(Document.user_id == user_id)
+    return stmt
+
+
+def _list_documents_stmt(
+    user_id: int,
+    *,
+    limit: int,
+    cursor: str | None,
+    status: str | None,
+    created_after: datetime | None,
+    created_before: datetime | None,
+) -> Select:
+    """Selects the listing.LIST_COLUMNS of one page of a user's documents."""
+    stmt = select(*LIST_COLUMNS).where(Document.user_id == user_id)
+
+    if status is not None:
+        stmt = stmt.where(Document.status == status)
+    if created_after is not None:
+        stmt = stmt.where(Document.created_at >= as_utc_naive(created_after))
+    if created_before is not None:
+        stmt = stmt.where(Document.created_at < as_utc_naive(created_before))
+
+    if cursor is not None:
+        created_at, last_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise InvalidCursorError("Malformed cursor")
+        if not isinstance(last_id, int):
+            raise InvalidCursorError("Malformed cursor")
+        stmt = stmt.where(
+            or_(
+                Document.created_at < created_at,
+                and_(Document.created_at == created_at, Document.id < last_id),
+            )
+        )
+
+    # limit + 1 tells us whether another page follows
+    return stmt.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit + 1)
+
+
+def _page(rows: list, limit: int) -> Tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def _transition_stmt(
+    document_id: int,
+    to_status: str,
+    from_statuses: Tuple[str, ...] | None,
+    values: dict,
+):
+    from_statuses = from_statuses or states.sources_for(to_status)
+    states.validate_transition(from_statuses, to_status)
+    return (
+        update(Document)
+        .where(Document.id == document_id, Document.status.in_(from_statuses))
+        .values(status=to_status, **values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _new_document_values(
+    user_id: int, filename: str, stored: StoredFile, status: str = states.UPLOADED
+) -> dict:
+    return {
+        "user_id": user_id,
+        "filename": filename,
+        "file_path": stored.path,
+        "size_bytes": stored.size,
+        "content_hash": stored.sha256,
+        "status": status,
+    }
+
+
+def _new_document(user_id: int, filename: str, stored: StoredFile) -> Document:
+    return Document(**_new_document_values(user_id, filename, stored))
+
+
+def _record_upload(stored: StoredFile) -> None:
+    metrics.uploads.inc()
+    metrics.upload_bytes.inc(amount=stored.size)
+
+
+def _record_processing(outcome: str, started: float) -> None:
+    metrics.processing_outcomes.inc(outcome)
+    metrics.processing_duration.observe(time.perf_counter() - started, outcome)
+
+
+def _log_event(message: str, document_id: int, event: str, **fields) -> None:
+    logger.info(
+        message,
+        extra={
+            "extra": {
+                "document_id": document_id,
+                "event": event,
+                **fields,
+            }
+        },
+    )
+
+
 class DocumentService:
     """
     Pure business logic for document lifecycle.
     No FastAPI dependencies.
+
+    Synchronous variant, used by the job worker: it only reads, transitions
+    and processes documents. Uploads, listings and processing requests come
+    from API routes, which use AsyncDocumentService so the event loop never
+    blocks on DB I/O.
     """
 
-    def __init__(self, db: Session, storage: LocalFileStorage | None = None):
+    def __init__(
+        self,
+        db: Session,
+        storage: StorageBackend | None = None,
+        executor: ProcessingExecutor | None = None,
+    ):
         self.db = db
-        self.storage = storage or LocalFileStorage()
+        self.storage = storage or get_storage()
+        self._executor = executor
+
+    @property
+    def executor(self) -> ProcessingExecutor:
+        # Created lazily: only workers run processing, the API never needs a pool
+        if self._executor is None:
+            self._executor = get_processing_executor()
+        return self._executor
+
+    # -------------------------
+    # Read
+    # -------------------------
+    def get_document(self, document_id: int, user_id: int | None) -> Document:
+        """
+        Fetch a document by ID.
+        If user_id is provided, validate ownership.
+        This allows background tasks to fetch the document without a user context.
+        """
+        document = self.db.execute(
+            _get_document_stmt(document_id, user_id)
+        ).scalar_one_or_none()
+        if not document:
+            raise DocumentNotFoundError()
+
+        return document
+
+    # -------------------------
+    # State transitions
+    # -------------------------
+    def transition(
+        self,
+        document_id: int,
+        to_status: str,
+        *,
+        from_statuses: Tuple[str, ...] | None = None,
+        commit: bool = True,
+        **values,
+    ) -> bool:
+        """
+        Atomically move a document to to_status.
+
+        Issued as one conditional UPDATE guarded by the allowed source
+        statuses; returns False when the row was not in one of them
+        (e.g. another request or worker got there first).
+        """
+        result = self.db.execute(
+            _transition_stmt(document_id, to_status, from_statuses, values)
+        )
+        if commit:
+            self.db.commit()
+        return result.rowcount == 1
+
+    # -------------------------
+    # Processing
+    # -------------------------
+    def process_document(self, document: Document) -> None:
+        """
+        Run processing for a document claimed as PROCESSING and store the result.
+        Pages are extracted in parallel on the bounded process pool;
+        exceptions propagate so the job worker can retry or dead-letter.
+        """
+        if document.status != states.PROCESSING:
+            _log_event(
+                "document_processing_skipped",
+                document.id,
+                "process_skipped",
+                status=document.status,
+            )
+            return
+
+        _log_event("document_processing_started", document.id, "process_started")
+
+        started = time.perf_counter()
+        try:
+            outcome = self._complete(document)
+        except Exception:
+            _record_processing("error", started)
+            raise
+        _record_processing(outcome, started)
+
+    def _complete(self, document: Document) -> str:
+        """Produce and store the result; returns the outcome for metrics."""
+        # Identical content may have been processed since this job was queued
+        cache = ResultCache(self.db)
+        result = cache.get(document.content_hash)
+        cached = result is not None
+        timings = {}
+        if cached:
+            stmts = store_result_stmts(document.id, result)
+        else:
+            with self.storage.local_path(document.file_path) as path:
+                result, timings = self._run_pipeline(document, path)
+            # Pages were persisted as they were extracted
+            stmts = store_summary_stmts(document.id, result)
+
+        # The result is completed in the transaction that completes the
+        # document, and only if this worker still owns it
+        page_count = len(result["pages"])
+        completed = self.transition(
+            document.id,
+            states.COMPLETED,
+            from_statuses=(states.PROCESSING,),
+            commit=False,
+            pages_done=page_count,
+            pages_total=page_count,
+        )
+        if completed:
+            for stmt in stmts:
+                self.db.execute(stmt)
+        if not cached:
+            # The output is valid even if the document was discarded
+            cache.put(document.content_hash, result)
+        self.db.commit()
+
+        _log_event(
+            "document_processing_completed",
+            document.id,
+            "process_completed" if completed else "process_discarded",
+            cached=cached,
+            pages=page_count,
+            **timings,
+        )
+        if not completed:
+            return "discarded"
+        return "cached" if cached else "completed"
+
+    def _run_pipeline(self, document: Document, path: str) -> Tuple[dict, dict]:
+        """
+        Fan the document's pages out over the process pool, persisting
+        pages and progress as they complete. Pages stored by an earlier,
+        interrupted attempt are reused.
+        """
+        done = {
+            page["number"]: page
+            for page in map(
+                decompress_page,
+                self.db.execute(stored_pages_stmt(document.id)).scalars(),
+            )
+        }
+
+        def record_progress(pages: List[dict], pages_done: int, pages_total: int | None = None) -> None:
+            values = {"pages_done": pages_done}
+            if pages_total is not None:
+                values["pages_total"] = pages_total
+            # Only while still PROCESSING: a worker that lost its lease
+            # must not write over a document someone else settled
+            owned = self.db.execute(
+                update(Document)
+                .where(Document.id == document.id, Document.status == states.PROCESSING)
+                .values(**values)
+            ).rowcount == 1
+            if owned:
+                for stmt in store_pages_stmts(document.id, pages):
+                    self.db.execute(stmt)
+            self.db.commit()
+
+        pipeline = ProcessingPipeline(
+            self.executor,
+            on_split=lambda page_count, pages_done: record_progress([], pages_done, page_count),
+            on_pages=record_progress,
+        )
+        return pipeline.run(path, document.filename, done)
+
+    def mark_failed(self, document: Document) -> None:
+        """Settle a document whose processing job was dead-lettered."""
+        if not self.transition(
+            document.id, states.FAILED, from_statuses=(states.PROCESSING,)
+        ):
+            return
+        metrics.processing_outcomes.inc("failed")
+        _log_event("document_processing_failed", document.id, "process_failed")
+
+
+class AsyncDocumentService:
+    """
+    Async variant of DocumentService for API routes.
+    DB I/O is awaited on an AsyncSession; blocking file I/O is pushed
+    to a worker thread. No FastAPI dependencies.
+    """
+
+    def __init__(self, db: AsyncSession, storage: StorageBackend | None = None):
+        self.db = db
+        self.storage = storage or get_storage()
 
     # -------------------------
     # Upload
     # -------------------------
-    def upload_document(
+    async def upload_document(
         self,
         *,
         user_id: int,
         filename: str,
-        file_bytes: bytes,
+        file: BinaryIO,
     ) -> Document:
-        file_path = self.storage.save_file(filename, file_bytes)
+        """
+        Stream the uploaded file to storage and record it.
+        The chunked copy runs in a thread so it never blocks the event loop.
+        """
+        stored = await asyncio.to_thread(self.storage.save_stream, filename, file)
+        return await self.create_document(user_id=user_id, filename=filename, stored=stored)
 
-        document = Document(
-            user_id=user_id,
-            filename=filename,
-            file_path=file_path,
-            status="UPLOADED",
-        )
+    async def create_document(
+        self,
+        *,
+        user_id: int,
+        filename: str,
+        stored: StoredFile,
+    ) -> Document:
+        """
+        Record a file already in storage, committing whatever else is
+        pending in the session with it. The file is removed again if the
+        commit fails.
+        """
+        document = _new_document(user_id, filename, stored)
 
         self.db.add(document)
-        self.db.commit()
-        self.db.refresh(document)
-        logger.info(
-    "document_uploaded",
-    extra={
-        "extra": {
-            "document_id": document.id,
-            "user_id": user_id,
-            "event": "uploaded",
-        }
-    },
-)
+        try:
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            await asyncio.to_thread(self.storage.delete, stored.path)
+            raise
+        await self.db.refresh(document)
+        _record_upload(stored)
+        _log_event("document_uploaded", document.id, "uploaded", user_id=user_id)
         return document
 
+    async def upload_batch(
+        self,
+        *,
+        user_id: int,
+        parts: List[UploadPart],
+        process: bool = False,
+        priority: str = scheduler.BATCH,
+    ) -> Tuple[List[Tuple[StagedItem, Optional[Document]]], Optional[str]]:
+        """
+        Store many files (ZIP parts expanded) and record them together.
+
+        Files are streamed to storage in one worker thread, then every
+        stored item is inserted with a single multi-row INSERT and one
+        commit. With process=True the documents are created PROCESSING and
+        their jobs inserted in the same transaction, provided the queue has
+        room for all of them; otherwise they stay UPLOADED and the reason
+        is returned alongside the per-item results. Batch jobs default to
+        the batch priority, so a bulk submission does not crowd out other
+        users' interactive work.
+        Raises BatchUploadError when the batch exceeds its limits,
+        UnknownPriorityError before anything is stored.
+        """
+        if process:
+            scheduler.weight_for(priority)
+        staged = await asyncio.to_thread(stage_batch, self.storage, parts)
+        stored = [item for item in staged if item.stored is not None]
+
+        status = states.UPLOADED
+        processing_error = None
+        queue = AsyncJobQueue(self.db)
+        documents: List[Document] = []
+        try:
+            if process and stored:
+                try:
+                    await queue.ensure_capacity(len(stored))
+                    status = states.PROCESSING
+                except QueueFullError as exc:
+                    processing_error = str(exc)
+
+            if stored:
+                result = await self.db.scalars(
+                    insert(Document).returning(Document, sort_by_parameter_order=True),
+                    [
+                        _new_document_values(user_id, item.filename, item.stored, status)
+                        for item in stored
+                    ],
+                )
+                documents = list(result)
+            if status == states.PROCESSING:
+                await queue.enqueue_many(documents, priority=priority)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            await asyncio.to_thread(discard_staged, self.storage, stored)
+            raise
+
+        by_item = {id(item): document for item, document in zip(stored, documents)}
+        for item in stored:
+            _record_upload(item.stored)
+        if status == states.PROCESSING:
+            for document in documents:
+                status_hub.publish(document.id, states.PROCESSING)
+        logger.info(
+            "document_batch_uploaded",
+            extra={
+                "extra": {
+                    "event": "batch_uploaded",
+                    "user_id": user_id,
+                    "uploaded": len(documents),
+                    "rejected": len(staged) - len(stored),
+                    "processing_queued": status == states.PROCESSING,
+                }
+            },
+        )
+        return [(item, by_item.get(id(item))) for item in staged], processing_error
+
     # -------------------------
     # Read
     # -------------------------
-    def list_documents_for_user(self, user_id: int) -> List[Document]:
-        """Return all documents owned by a specific user."""
-        return (
-            self.db.query(Document)
-            .filter(Document.user_id == user_id)
-            .order_by(Document.created_at.desc())
-            .all()
-        )
-
-    def get_document(self, document_id: int, user_id: int | None) -> Document:
+    async def list_document_rows_for_user(
+        self,
+        user_id: int,
+        *,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        status: str | None = None,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> Tuple[List[tuple], str | None]:
         """
-        Fetch a document by ID.
-        If user_id is provided, validate ownership.
-        This allows background tasks to fetch the document without a user context.
+        Return one page of a user's documents, newest first, and the cursor
+        for the next page (None on the last page).
+
+        Keyset pagination over (created_at, id) served by the
+        (user_id, created_at, id) index, so the cost of a page does not
+        depend on how deep into the listing it is. Rows hold only
+        listing.LIST_COLUMNS: no ORM objects are built or tracked.
         """
-        query = self.db.query(Document).filter(Document.id == document_id)
-        if user_id is not None:
-            query = query.filter(Document.user_id == user_id)
+        stmt = _list_documents_stmt(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            created_after=created_after,
+            created_before=created_before,
+        )
+        result = await self.db.execute(stmt)
+        return _page(result.all(), limit)
 
-        document = query.first()
+    async def get_document(self, document_id: int, user_id: int | None) -> Document:
+        result = await self.db.execute(_get_document_stmt(document_id, user_id))
+        document = result.scalar_one_or_none()
         if not document:
             raise DocumentNotFoundError()
 
         return document
 
     # -------------------------
-    # Processing
+    # State transitions
+    # -------------------------
+    async def transition(
+        self,
+        document_id: int,
+        to_status: str,
+        *,
+        from_statuses: Tuple[str, ...] | None = None,
+        commit: bool = True,
+        **values,
+    ) -> bool:
+        """
+        See DocumentService.transition.
+        Committed transitions are published to the status hub; with
+        commit=False the caller publishes after its own commit.
+        """
+        result = await self.db.execute(
+            _transition_stmt(document_id, to_status, from_statuses, values)
+        )
+        changed = result.rowcount == 1
+        if commit:
+            await self.db.commit()
+            if changed:
+                status_hub.publish(document_id, to_status)
+        return changed
+
     # -------------------------
+    # Processing
     # -------------------------
-# Processing
-# -------------------------
-    def process_document(self, document: Document) -> None:
-        document.status = "PROCESSING"
-        self.db.commit()
+    async def request_processing(
+        self, document: Document, priority: str = scheduler.DEFAULT_PRIORITY
+    ) -> bool:
+        """
+        Claim the document for processing and queue a job for it at
+        `priority` (see app.jobs.scheduler).
 
-        try:
-        # Simulate processing time
-            time.sleep(15)  # 5 seconds
+        The claim and the job insert share one transaction, so a document
+        can never be left PROCESSING without a job that will settle it.
+        Content already processed by the current processor version is
+        completed straight from the result cache without queueing a job.
+        Returns False if the document was not claimable; the caller can
+        read the current status from the refreshed document.
+        Raises QueueFullError (with the claim rolled back) under backpressure,
+        UnknownPriorityError before claiming anything.
+        """
+        scheduler.weight_for(priority)
+        claimed = await self.transition(document.id, states.PROCESSING, commit=False)
+        if not claimed:
+            await self.db.rollback()
+            await self.db.refresh(document)
+            return False
 
-            result = {"text": f"Processed content for {document.filename}"}
-            document.status = "COMPLETED"
-            document.result = result["text"]
+        cached = await AsyncResultCache(self.db).get(document.content_hash)
+        if cached is not None:
+            page_count = len(cached["pages"])
+            await self.transition(
+                document.id,
+                states.COMPLETED,
+                from_statuses=(states.PROCESSING,),
+                commit=False,
+                pages_done=page_count,
+                pages_total=page_count,
+            )
+            for stmt in store_result_stmts(document.id, cached):
+                await self.db.execute(stmt)
+            await self.db.commit()
+            status_hub.publish(document.id, states.COMPLETED)
+            metrics.processing_outcomes.inc("cached")
+            await self.db.refresh(document)
+            _log_event(
+                "document_processing_completed",
+                document.id,
+                "process_completed",
+                cached=True,
+            )
+            return True
 
+        try:
+            await AsyncJobQueue(self.db).enqueue(document, priority=priority, commit=False)
         except Exception:
-            document.status = "FAILED"
-
-        self.db.commit()
-        logger.info(
-    "document_processing_started",
-    extra={
-        "extra": {
-            "document_id": document.id,
-            "event": "process_started",
-        }
-    },
-)
-
+            await self.db.rollback()
+            raise
+        await self.db.commit()
+        status_hub.publish(document.id, states.PROCESSING)
+        await self.db.refresh(document)
+        _log_event("document_processing_queued", document.id, "process_queued")
+        return True
@@ -0,0 +1,53 @@
+# app/documents/states.py
+
+"""
+Document status state machine.
+
+    UPLOADED ──► PROCESSING ──► COMPLETED
+                    │  ▲
+                    ▼  │
+                   FAILED
+
+Transitions are applied by the service as a single conditional UPDATE
+(`WHERE status IN (<allowed sources>)`), so concurrent requests across
+processes can never both win the same transition.
+"""
+
+from typing import Dict, FrozenSet, Tuple
+
+UPLOADED = "UPLOADED"
+PROCESSING = "PROCESSING"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+
+TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    UPLOADED: frozenset({PROCESSING}),
+    PROCESSING: frozenset({COMPLETED, FAILED}),
+    FAILED: frozenset({PROCESSING}),
+    COMPLETED: frozenset(),
+}
+
+TERMINAL_STATUSES = frozenset({COMPLETED, FAILED})
+
+
+class InvalidTransitionError(Exception):
+    pass
+
+
+def can_transition(from_status: str, to_status: str) -> bool:
+    return to_status in TRANSITIONS.get(from_status, frozenset())
+
+
+def sources_for(to_status: str) -> Tuple[str, ...]:
+    """All statuses from which to_status may be reached."""
+    return tuple(
+        sorted(src for src, targets in TRANSITIONS.items() if to_status in targets)
+    )
+
+
+def validate_transition(from_statuses: Tuple[str, ...], to_status: str) -> None:
+    for from_status in from_statuses:
+        if not can_transition(from_status, to_status):
+            raise InvalidTransitionError(
+                f"Transition {from_status} -> {to_status} is not allowed"
+            )
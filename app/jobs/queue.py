@@ -0,0 +1,432 @@
+# app/jobs/queue.py
+
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, case, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core import metrics
+from app.db.base import utcnow
+from app.db.models import Job
+from app.jobs import scheduler
+
+logger = get_logger("jobs")
+
+PROCESS_DOCUMENT = "process_document"
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+DEAD = "DEAD"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def _active_job_stmt(document_id: int, kind: str):
+    return select(Job).where(
+        Job.document_id == document_id,
+        Job.kind == kind,
+        Job.status.in_(ACTIVE_STATUSES),
+    )
+
+
+def _depth_stmt():
+    return select(func.count(Job.id)).where(Job.status == QUEUED)
+
+
+def _stats_stmt():
+    return select(Job.status, func.count(Job.id)).group_by(Job.status)
+
+
+def _check_depth(depth: int, incoming: int = 1) -> None:
+    if depth + incoming > settings.PROCESSING_QUEUE_MAX:
+        if incoming == 1:
+            raise QueueFullError(
+                f"Processing queue is full ({settings.PROCESSING_QUEUE_MAX} jobs waiting)"
+            )
+        raise QueueFullError(
+            f"Processing queue cannot take {incoming} more jobs "
+            f"({depth} of {settings.PROCESSING_QUEUE_MAX} waiting)"
+        )
+
+
+def _new_job_values(document_id: int, kind: str, **values) -> dict:
+    now = utcnow()
+    return {
+        "kind": kind,
+        "document_id": document_id,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+        "run_at": now,
+        "created_at": now,
+        **values,
+    }
+
+
+def _new_job(document_id: int, kind: str, **values) -> Job:
+    return Job(**_new_job_values(document_id, kind, **values))
+
+
+def _user_wait_stmt(since):
+    """Per user: queued jobs, and the waits of jobs first claimed since `since`."""
+    recent_wait = case((Job.started_at >= since, Job.queue_wait_seconds))
+    return (
+        select(
+            Job.user_id,
+            func.sum(case((Job.status == QUEUED, 1), else_=0)).label("queued"),
+            func.min(case((Job.status == QUEUED, Job.created_at))).label("oldest_queued"),
+            func.count(recent_wait).label("started"),
+            func.avg(recent_wait).label("avg_wait"),
+            func.max(recent_wait).label("max_wait"),
+        )
+        .where(or_(Job.status == QUEUED, Job.started_at >= since))
+        .group_by(Job.user_id)
+    )
+
+
+def _user_waits(rows, now) -> List[Dict[str, object]]:
+    """Longest current or recent wait first, capped at SCHEDULER_STATS_MAX_USERS."""
+    users = []
+    for row in rows:
+        waiting = (now - row.oldest_queued).total_seconds() if row.oldest_queued else None
+        users.append(
+            {
+                "user_id": row.user_id,
+                "queued": row.queued,
+                "oldest_queued_wait_seconds": _round(waiting),
+                "started": row.started,
+                "avg_wait_seconds": _round(row.avg_wait),
+                "max_wait_seconds": _round(row.max_wait),
+            }
+        )
+    users.sort(
+        key=lambda user: max(user["oldest_queued_wait_seconds"] or 0, user["max_wait_seconds"] or 0),
+        reverse=True,
+    )
+    return users[: settings.SCHEDULER_STATS_MAX_USERS]
+
+
+def _round(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds, 1)
+
+
+def _priority_stats_stmt():
+    return (
+        select(Job.priority, func.count(Job.id))
+        .where(Job.status == QUEUED)
+        .group_by(Job.priority)
+    )
+
+
+def _stats(counts: Dict[str, int]) -> Dict[str, int]:
+    return {
+        "queued": counts.get(QUEUED, 0),
+        "running": counts.get(RUNNING, 0),
+        "dead": counts.get(DEAD, 0),
+        "queue_limit": settings.PROCESSING_QUEUE_MAX,
+    }
+
+
+class JobQueue:
+    """
+    Database-backed job queue, consumer side (job workers).
+
+    Every state change is a conditional UPDATE checked by rowcount, so any
+    number of worker processes can share the table without double-claiming.
+    No FastAPI dependencies.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # -------------------------
+    # Consumer side
+    # -------------------------
+    def _claimable(self, now):
+        claimable = or_(
+            and_(Job.status == QUEUED, Job.run_at <= now),
+            and_(
+                Job.status == RUNNING,
+                Job.lease_expires_at < now,
+                Job.attempts < Job.max_attempts,
+            ),
+        )
+        cap = settings.SCHEDULER_MAX_RUNNING_PER_USER
+        if not cap:
+            return claimable
+        # Jobs the owner has running under a live lease, across all workers
+        running = aliased(Job)
+        running_for_user = (
+            select(func.count(running.id))
+            .where(
+                running.user_id == Job.user_id,
+                running.status == RUNNING,
+                running.lease_expires_at >= now,
+            )
+            .scalar_subquery()
+        )
+        return and_(claimable, or_(Job.user_id.is_(None), running_for_user < cap))
+
+    def claim(self, worker_id: str, *, batch: int = 10) -> Optional[Job]:
+        """
+        Lease the next runnable job for worker_id: the one with the lowest
+        fair-share finish tag whose owner is below the running-jobs cap.
+        Jobs whose lease expired are picked up again, which is how work
+        interrupted by a crash or restart gets resumed.
+        """
+        now = utcnow()
+        candidates = (
+            self.db.query(Job.id, Job.virtual_finish, Job.created_at)
+            .filter(self._claimable(now))
+            .order_by(Job.virtual_finish, Job.id)
+            .limit(batch)
+            .all()
+        )
+
+        for job_id, virtual_finish, created_at in candidates:
+            wait = (now - created_at).total_seconds() if created_at is not None else None
+            result = self.db.execute(
+                update(Job)
+                .where(Job.id == job_id, self._claimable(now))
+                .values(
+                    status=RUNNING,
+                    attempts=Job.attempts + 1,
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    started_at=func.coalesce(Job.started_at, now),
+                    queue_wait_seconds=func.coalesce(Job.queue_wait_seconds, wait),
+                )
+            )
+            if result.rowcount == 1:
+                if virtual_finish is not None:
+                    self._advance_clock(virtual_finish)
+                self.db.commit()
+                job = self.db.get(Job, job_id, populate_existing=True)
+                if job.attempts == 1 and job.queue_wait_seconds is not None:
+                    metrics.job_queue_wait.observe(job.queue_wait_seconds, job.priority)
+                return job
+            self.db.commit()
+
+        return None
+
+    def _advance_clock(self, virtual_finish: float) -> None:
+        """Virtual time follows the finish tags of claimed jobs."""
+        if self.db.execute(scheduler.advance_clock_stmt(virtual_finish)).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(scheduler.init_clock_stmt(virtual_finish))
+        except IntegrityError:
+            # Another worker created the row first
+            self.db.execute(scheduler.advance_clock_stmt(virtual_finish))
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the lease. Returns False if the lease was lost."""
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == worker_id)
+            .values(
+                lease_expires_at=utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            )
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == worker_id)
+            .values(status=SUCCEEDED, lease_owner=None, lease_expires_at=None)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[Job]:
+        """
+        Record a failed attempt.
+        The job is re-queued with exponential backoff, or dead-lettered
+        once it has used up its attempts. Returns None if the lease was lost.
+        """
+        job = self.db.get(Job, job_id, populate_existing=True)
+        if job is None or job.status != RUNNING or job.lease_owner != worker_id:
+            return None
+
+        if job.attempts >= job.max_attempts:
+            values = {"status": DEAD}
+        else:
+            delay = min(
+                settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1),
+                settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+            )
+            values = {"status": QUEUED, "run_at": utcnow() + timedelta(seconds=delay)}
+
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == RUNNING, Job.lease_owner == worker_id)
+            .values(lease_owner=None, lease_expires_at=None, last_error=error, **values)
+        )
+        self.db.commit()
+        if result.rowcount != 1:
+            return None
+
+        logger.info(
+            "job_failed",
+            extra={
+                "extra": {
+                    "job_id": job_id,
+                    "document_id": job.document_id,
+                    "attempts": job.attempts,
+                    "status": values["status"],
+                    "error": error,
+                }
+            },
+        )
+        return self.db.get(Job, job_id, populate_existing=True)
+
+    def reap_expired(self) -> List[Job]:
+        """
+        Dead-letter jobs whose lease expired after their final attempt,
+        i.e. the worker died while running them for the last time.
+        """
+        now = utcnow()
+        expired = (
+            self.db.query(Job)
+            .filter(
+                Job.status == RUNNING,
+                Job.lease_expires_at < now,
+                Job.attempts >= Job.max_attempts,
+            )
+            .all()
+        )
+
+        reaped = []
+        for job in expired:
+            result = self.db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == RUNNING, Job.lease_expires_at < now)
+                .values(
+                    status=DEAD,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    last_error="Lease expired on final attempt",
+                )
+            )
+            if result.rowcount == 1:
+                reaped.append(job)
+        self.db.commit()
+        return reaped
+
+
+class AsyncJobQueue:
+    """
+    Producer side of the job queue, for async API routes.
+    Consuming jobs is the worker's business and stays on JobQueue.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(
+        self,
+        document,
+        *,
+        priority: str = scheduler.DEFAULT_PRIORITY,
+        kind: str = PROCESS_DOCUMENT,
+        commit: bool = True,
+    ) -> Job:
+        """
+        Queue a job for a document, reusing an already active one.
+        The job is tagged for fair-share ordering among the owner's
+        jobs of the same priority.
+        With commit=False the job joins the caller's transaction.
+        Raises QueueFullError once PROCESSING_QUEUE_MAX jobs are waiting,
+        UnknownPriorityError for a priority without a weight.
+        """
+        result = await self.db.execute(_active_job_stmt(document.id, kind))
+        existing = result.scalars().first()
+        if existing:
+            return existing
+
+        _check_depth(await self.depth())
+
+        (tags,) = await self._tags(document.user_id, priority, [document.size_bytes])
+        job = _new_job(document.id, kind, **scheduler.job_values(document, priority, tags))
+        self.db.add(job)
+        if commit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
+        return job
+
+    async def ensure_capacity(self, incoming: int) -> None:
+        """Raise QueueFullError unless `incoming` more jobs fit in the queue."""
+        _check_depth(await self.depth(), incoming)
+
+    async def enqueue_many(
+        self,
+        documents: list,
+        *,
+        priority: str = scheduler.DEFAULT_PRIORITY,
+        kind: str = PROCESS_DOCUMENT,
+    ) -> None:
+        """
+        Queue jobs for freshly created documents of one user in one INSERT,
+        inside the caller's transaction. The documents must not have active
+        jobs; check ensure_capacity first.
+        """
+        if not documents:
+            return
+        tags = await self._tags(
+            documents[0].user_id, priority, [document.size_bytes for document in documents]
+        )
+        await self.db.execute(
+            insert(Job),
+            [
+                _new_job_values(
+                    document.id, kind, **scheduler.job_values(document, priority, document_tags)
+                )
+                for document, document_tags in zip(documents, tags)
+            ],
+        )
+
+    async def _tags(self, user_id: Optional[int], priority: str, sizes: list) -> list:
+        scheduler.weight_for(priority)
+        virtual_time = (await self.db.execute(scheduler.clock_stmt())).scalar() or 0.0
+        flow_finish = (
+            await self.db.execute(scheduler.flow_finish_stmt(user_id, priority))
+        ).scalar()
+        return scheduler.finish_tags(virtual_time, flow_finish, priority, sizes)
+
+    async def depth(self) -> int:
+        return (await self.db.execute(_depth_stmt())).scalar_one()
+
+    async def stats(self) -> Dict[str, object]:
+        """
+        Job counts, queued jobs per priority, and per-user queue waits:
+        how long each user's oldest queued job has waited, and the waits
+        of their jobs first claimed within SCHEDULER_WAIT_WINDOW_SECONDS.
+        """
+        now = utcnow()
+        since = now - timedelta(seconds=settings.SCHEDULER_WAIT_WINDOW_SECONDS)
+        counts = _stats(dict((await self.db.execute(_stats_stmt())).all()))
+        by_priority = dict((await self.db.execute(_priority_stats_stmt())).all())
+        user_waits = (await self.db.execute(_user_wait_stmt(since))).all()
+        return {
+            **counts,
+            "queued_by_priority": {
+                priority: by_priority.get(priority, 0)
+                for priority in settings.SCHEDULER_PRIORITY_WEIGHTS
+            },
+            "wait_window_seconds": settings.SCHEDULER_WAIT_WINDOW_SECONDS,
+            "users": _user_waits(user_waits, now),
+        }
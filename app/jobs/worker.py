@@ -0,0 +1,247 @@
+"""
+app/jobs/worker.py
+
+Standalone worker process for background jobs.
+
+Run one or more of these next to the API:
+
+    python -m app.jobs.worker --concurrency 4
+
+Each worker runs N threads that claim jobs from the database queue, keep
+their lease alive with heartbeats while processing, and record success,
+retry or dead-lettering. The processing itself runs in a bounded process
+pool, and a thread only claims a job while the pool has a free slot.
+Throughput scales with the number of worker processes; the API process
+never runs processing itself.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Optional, Self
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import registry, start_metrics_server
+from app.db.migrations import upgrade_schema
+from app.db.session import SessionLocal, engine
+from app.documents.executor import ProcessingExecutor
+from app.documents.result_cache import ResultCache
+from app.documents.resumable import expire_upload_sessions
+from app.documents.search import ensure_search_index
+from app.documents.service import DocumentNotFoundError, DocumentService
+from app.jobs.queue import PROCESS_DOCUMENT, DEAD, JobQueue
+
+logger = get_logger("worker")
+
+
+class _Heartbeat:
+    """Keeps a job lease alive from a side thread while the job runs."""
+
+    def __init__(self, job_id: int, worker_id: str, interval: float):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                if not JobQueue(db).heartbeat(self.job_id, self.worker_id):
+                    logger.info(
+                        "job_lease_lost",
+                        extra={"extra": {"job_id": self.job_id, "worker_id": self.worker_id}},
+                    )
+                    return
+            except Exception:
+                logger.exception("job_heartbeat_failed")
+            finally:
+                db.close()
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class Worker:
+    def __init__(
+        self,
+        concurrency: int = settings.WORKER_CONCURRENCY,
+        poll_interval: float = settings.WORKER_POLL_INTERVAL_SECONDS,
+        worker_id: Optional[str] = None,
+        executor: Optional[ProcessingExecutor] = None,
+    ):
+        self.executor = executor or ProcessingExecutor()
+        self.concurrency = concurrency or self.executor.capacity
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.stop_event = threading.Event()
+        registry.add_collector(self._collect_metrics)
+
+    def _collect_metrics(self):
+        stats = self.executor.stats()
+        for key, type_, help_ in (
+            ("in_flight", "gauge", "Processing tasks submitted and not yet finished"),
+            ("queue_depth", "gauge", "Processing tasks waiting for a pool process"),
+            ("utilization", "gauge", "Fraction of pool processes busy"),
+            ("completed", "counter", "Processing tasks finished"),
+            ("rejected", "counter", "Processing submissions rejected as saturated"),
+        ):
+            name = f"processing_pool_{key}" + ("_total" if type_ == "counter" else "")
+            yield name, type_, help_, [(name, {}, stats[key])]
+
+    def run(self) -> None:
+        logger.info(
+            "worker_started",
+            extra={"extra": {"worker_id": self.worker_id, "concurrency": self.concurrency}},
+        )
+        threads = [
+            threading.Thread(target=self._loop, args=(slot,), name=f"worker-{slot}")
+            for slot in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.executor.shutdown()
+        logger.info("worker_stopped", extra={"extra": {"worker_id": self.worker_id}})
+
+    def stop(self, *_args) -> None:
+        self.stop_event.set()
+
+    def _loop(self, slot: int) -> None:
+        slot_id = f"{self.worker_id}/{slot}"
+        last_report = time.monotonic()
+        while not self.stop_event.is_set():
+            try:
+                if slot == 0:
+                    self._reap()
+                    if time.monotonic() - last_report >= settings.WORKER_STATS_INTERVAL_SECONDS:
+                        self._report_stats()
+                        last_report = time.monotonic()
+                if not self.run_once(slot_id):
+                    self.stop_event.wait(self.poll_interval)
+            except Exception:
+                logger.exception("worker_loop_error")
+                self.stop_event.wait(self.poll_interval)
+
+    def _reap(self) -> None:
+        db = SessionLocal()
+        try:
+            for job in JobQueue(db).reap_expired():
+                self._settle_dead(db, job.document_id)
+            expire_upload_sessions(db)
+        finally:
+            db.close()
+
+    def _report_stats(self) -> None:
+        logger.info(
+            "worker_stats",
+            extra={
+                "extra": {
+                    "worker_id": self.worker_id,
+                    **self.executor.stats(),
+                }
+            },
+        )
+
+    def run_once(self, slot_id: str) -> bool:
+        """
+        Claim and run a single job.
+        Returns False if the queue was empty or the pool has no free slot.
+        """
+        if not self.executor.has_capacity():
+            return False
+
+        db = SessionLocal()
+        try:
+            queue = JobQueue(db)
+            job = queue.claim(slot_id)
+            if job is None:
+                return False
+
+            with _Heartbeat(job.id, slot_id, settings.JOB_HEARTBEAT_SECONDS):
+                try:
+                    self._execute(db, job)
+                except Exception as exc:
+                    # Any failure counts against the job; keep the traceback
+                    logger.exception(
+                        "job_error",
+                        extra={"extra": {"job_id": job.id, "document_id": job.document_id}},
+                    )
+                    db.rollback()
+                    failed = queue.fail(job.id, slot_id, f"{type(exc).__name__}: {exc}")
+                    if failed is not None and failed.status == DEAD:
+                        self._settle_dead(db, failed.document_id)
+                else:
+                    queue.complete(job.id, slot_id)
+            return True
+        finally:
+            db.close()
+
+    def _execute(self, db, job) -> None:
+        if job.kind != PROCESS_DOCUMENT:
+            raise ValueError(f"Unknown job kind '{job.kind}'")
+
+        service = DocumentService(db=db, executor=self.executor)
+        document = service.get_document(document_id=job.document_id, user_id=None)
+        service.process_document(document)
+
+    def _settle_dead(self, db, document_id: int) -> None:
+        service = DocumentService(db=db)
+        try:
+            document = service.get_document(document_id=document_id, user_id=None)
+        except DocumentNotFoundError:
+            return
+        service.mark_failed(document)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the background job worker.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="Job threads; 0 matches the processing pool capacity",
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=settings.WORKER_POLL_INTERVAL_SECONDS
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.WORKER_METRICS_PORT,
+        help="Serve Prometheus metrics on this port; 0 disables",
+    )
+    args = parser.parse_args(argv)
+
+    upgrade_schema(engine)
+    ensure_search_index(engine)
+
+    db = SessionLocal()
+    try:
+        purged = ResultCache(db).purge_stale()
+    finally:
+        db.close()
+    if purged:
+        logger.info("result_cache_purged", extra={"extra": {"entries": purged}})
+
+    worker = Worker(concurrency=args.concurrency, poll_interval=args.poll_interval)
+    if start_metrics_server(args.metrics_port):
+        logger.info("metrics_server_started", extra={"extra": {"port": args.metrics_port}})
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
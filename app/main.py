@@ -1,15 +1,26 @@
 # app/main.py
 
+import asyncio
 import os
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.router import router as auth_router
 from app.documents.router import router as documents_router
 
-from app.db.base import Base
-from app.db.session import engine
-from app.core.logging import get_logger, logging_middleware
+from app.db.migrations import upgrade_schema
+from app.db.session import async_engine, engine, get_async_db, pool_stats
+from app.jobs.queue import AsyncJobQueue
+from app.core.security import password_hasher, principal_cache
+from app.documents.events import status_hub
+from app.documents.result_cache import AsyncResultCache, result_cache_metrics
+from app.documents.search import ensure_search_index
+from app.storage.backends import get_storage
+from app.core.config import settings
+from app.core.logging import AccessLogMiddleware, get_logger, log_stats
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.core.profiling import ProfilingMiddleware
 
 logger = get_logger(__name__)
 
@@ -19,8 +30,16 @@ def create_application() -> FastAPI:
         version="1.0.0",
     )
 
-    # ✅ Use function-based middleware
-    app.middleware("http")(logging_middleware)
+    # Only installed when enabled, so disabled profiling costs nothing;
+    # inside the access logger, whose request_id keys the profile
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware, engines=[engine, async_engine.sync_engine]
+        )
+    # ✅ Pure ASGI middleware: no per-request task or body buffering
+    app.add_middleware(AccessLogMiddleware)
+    # Outermost, so latency covers every other middleware
+    app.add_middleware(MetricsMiddleware)
 
     # ✅ Include routers
     app.include_router(auth_router)
@@ -35,12 +54,21 @@ app = create_application()
 @app.on_event("startup")
 def on_startup() -> None:
     # ✅ Ensure uploads folder exists
-    os.makedirs("./uploads", exist_ok=True)
-    logger.info("Uploads folder ready at ./uploads")
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    logger.info(
+        "Uploads folder ready",
+        extra={"extra": {"path": str(settings.UPLOAD_DIR)}},
+    )
 
     # ✅ Create database tables if not exists
     logger.info("Starting application and creating database tables if needed")
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    ensure_search_index(engine)
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await status_hub.stop()
 
 
 @app.get("/health", tags=["system"])
@@ -49,6 +77,33 @@ def health_check() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/stats", tags=["system"])
+async def stats(db: AsyncSession = Depends(get_async_db)) -> dict:
+    """
+    Operational counters. Processing pool utilization is reported by each
+    worker process in its periodic worker_stats log line.
+    """
+    return {
+        "processing_queue": await AsyncJobQueue(db).stats(),
+        "auth_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "db_pool": pool_stats(),
+        "status_hub": status_hub.stats(),
+        "result_cache": {
+            **result_cache_metrics.stats(),
+            "entries": await AsyncResultCache(db).entries(),
+        },
+        "storage": await asyncio.to_thread(get_storage().stats),
+        "logging": log_stats(),
+    }
+
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the in-process metrics registry."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     """Catch-all for unexpected errors"""
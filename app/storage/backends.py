@@ -0,0 +1,33 @@
+#app/storage/backends
+import threading
+
+from app.core.config import settings
+from app.storage.base import StorageBackend
+from app.storage.dedup_storage import DedupFileStorage
+from app.storage.file_storage import LocalFileStorage
+from app.storage.object_storage import FilesystemObjectStorage
+
+BACKENDS = {
+    "local": LocalFileStorage,
+    "dedup": DedupFileStorage,
+    "object": FilesystemObjectStorage,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend selected by settings.STORAGE_BACKEND."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            try:
+                backend = BACKENDS[settings.STORAGE_BACKEND]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown storage backend '{settings.STORAGE_BACKEND}'. "
+                    f"Available: {', '.join(BACKENDS)}"
+                )
+            _storage = backend()
+        return _storage
@@ -0,0 +1,151 @@
+#app/storage/base
+"""
+Storage backend interface.
+
+Backends address files by a key relative to their own root, and that key
+is what gets stored in Document.file_path. Moving a backend's root
+directory, or swapping the bucket behind it, therefore needs no row
+rewrites.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """
+    Outcome of a completed write: the backend key the file landed under,
+    how many bytes were written and their SHA-256 digest.
+    """
+    path: str
+    size: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class FileStat:
+    size: int
+    modified_at: float
+
+
+class RangeReader(io.RawIOBase):
+    """Exposes at most `length` bytes of an underlying stream."""
+
+    def __init__(self, raw: BinaryIO, length: Optional[int]):
+        self._raw = raw
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining is not None:
+            if self._remaining <= 0:
+                return 0
+            buffer = memoryview(buffer)[: self._remaining]
+        n = self._raw.readinto(buffer)
+        if self._remaining is not None:
+            self._remaining -= n
+        return n
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+class StorageBackend(ABC):
+    """
+    Abstract file storage.
+    Decoupled from FastAPI and database layers.
+    """
+
+    name = "abstract"
+    ALLOWED_EXTENSIONS = {".pdf", ".docx"}
+
+    def _validate_extension(self, filename: str) -> str:
+        extension = Path(filename).suffix.lower()
+
+        if extension not in self.ALLOWED_EXTENSIONS:
+            raise ValueError(
+                f"Invalid file type '{extension}'. "
+                f"Allowed types: {', '.join(self.ALLOWED_EXTENSIONS)}"
+            )
+
+        return extension
+
+    @abstractmethod
+    def save_stream(
+        self,
+        filename: str,
+        stream: BinaryIO,
+        chunk_size: int | None = None,
+    ) -> StoredFile:
+        """Copy a binary stream into storage in chunks; returns its key."""
+
+    @abstractmethod
+    def open_range(self, key: str, offset: int = 0, length: int | None = None) -> BinaryIO:
+        """Stream `length` bytes (all remaining if None) starting at `offset`."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a file. Missing files are not an error."""
+
+    @abstractmethod
+    def stat(self, key: str) -> FileStat:
+        """Size and modification time; raises FileNotFoundError if absent."""
+
+    def open(self, key: str) -> BinaryIO:
+        return self.open_range(key)
+
+    def direct_path(self, key: str) -> Optional[Path]:
+        """
+        Plain file holding exactly the stored bytes, which the web server
+        can send with sendfile; None when the backend has no such file.
+        """
+        return None
+
+    def save_staged(self, filename: str, path: Path, size: int, sha256: str) -> StoredFile:
+        """
+        Store a fully written local file (e.g. a finished resumable upload);
+        size and sha256 are already known. The staged file is left in place
+        for the caller to remove once the stored file is recorded. The
+        default copies it in; backends on the same filesystem override this
+        with a hard link.
+        """
+        with open(path, "rb") as stream:
+            return self.save_stream(filename, stream)
+
+    def save_file(self, filename: str, file_bytes: bytes) -> str:
+        """
+        Save raw file bytes with a unique key.
+        Returns the key as string.
+        """
+        return self.save_stream(filename, io.BytesIO(file_bytes)).path
+
+    @contextlib.contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """
+        A real filesystem path holding the file, for consumers that need
+        one (e.g. the processor). The default copies into a temp file that
+        is removed on exit; backends storing plain files override this.
+        """
+        fd, tmp_name = tempfile.mkstemp(suffix=Path(key).suffix)
+        try:
+            with os.fdopen(fd, "wb") as out, self.open(key) as src:
+                shutil.copyfileobj(src, out, settings.UPLOAD_CHUNK_SIZE)
+            yield tmp_name
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": self.name}
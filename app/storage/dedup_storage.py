@@ -0,0 +1,361 @@
+#app/storage/dedup storage
+"""
+Deduplicating file storage.
+
+Files are split into content-defined chunks, each chunk is stored once
+under its SHA-256, and every file is recorded as a manifest listing its
+chunks. Revisions of the same document share most chunks, so they cost
+only the bytes that actually changed.
+
+Chunk boundaries are placed at anchors located with the regex engine
+(C speed, no per-byte Python loop):
+- PDF object ends (``endobj``), so edited or appended objects only
+  disturb their own chunk;
+- ZIP local file headers (``PK\\x03\\x04``), i.e. DOCX part boundaries;
+- a rare 3-byte pattern that occurs by chance in compressed streams.
+A boundary is only taken once a chunk reaches min_chunk_size, and a chunk
+is cut unconditionally at max_chunk_size. Because boundaries depend on
+content rather than offsets, an insertion early in a file does not shift
+every later chunk.
+
+Reference counts and manifest sizes live in a small SQLite index next to
+the chunks; the storage stays independent of the application database.
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from uuid import uuid4
+
+from app.core.config import settings
+from app.storage.base import FileStat, RangeReader, StorageBackend, StoredFile
+
+_ANCHORS = re.compile(rb"endobj\r?\n|PK\x03\x04|[\x00-\x0f]\xa5[\xf0-\xff]")
+
+
+def iter_chunks(
+    stream: BinaryIO,
+    min_size: int,
+    max_size: int,
+    read_size: int,
+) -> Iterator[bytes]:
+    """Split a stream into content-defined chunks using bounded memory."""
+    # The buffer is always topped up to max_size (or EOF) before searching,
+    # so an anchor is never missed across a read boundary.
+    buffer = bytearray()
+    eof = False
+
+    while buffer or not eof:
+        while not eof and len(buffer) < max_size:
+            block = stream.read(read_size)
+            if not block:
+                eof = True
+            else:
+                buffer += block
+
+        if not buffer:
+            return
+
+        cut = None
+        if len(buffer) > min_size:
+            match = _ANCHORS.search(buffer, min_size, max_size)
+            if match is not None:
+                # ZIP headers start a part; other anchors end one
+                cut = match.start() if match.group().startswith(b"PK") else match.end()
+                if cut <= min_size:
+                    cut = None
+
+        if cut is None:
+            cut = min(len(buffer), max_size)
+
+        yield bytes(buffer[:cut])
+        del buffer[:cut]
+
+
+class ChunkedReader(io.RawIOBase):
+    """Streams a file back by reading its chunks in manifest order."""
+
+    def __init__(self, chunk_paths: List[Path], skip: int = 0):
+        self._paths = iter(chunk_paths)
+        self._current: BinaryIO | None = None
+        self._skip = skip
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while True:
+            if self._current is None:
+                path = next(self._paths, None)
+                if path is None:
+                    return 0
+                self._current = path.open("rb")
+                if self._skip:
+                    self._current.seek(self._skip)
+                    self._skip = 0
+            n = self._current.readinto(buffer)
+            if n:
+                return n
+            self._current.close()
+            self._current = None
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+class DedupFileStorage(StorageBackend):
+    """
+    Chunk-deduplicating file storage.
+    Keys returned are manifest paths relative to the storage root.
+    Decoupled from FastAPI and database layers.
+    """
+
+    name = "dedup"
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = Path(root or settings.DEDUP_STORAGE_DIR)
+        self.chunk_dir = self.root / "chunks"
+        self.manifest_dir = self.root / "manifests"
+        self.tmp_dir = self.root / "tmp"
+        for directory in (self.chunk_dir, self.manifest_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self.min_chunk_size = settings.DEDUP_MIN_CHUNK_SIZE
+        self.max_chunk_size = settings.DEDUP_MAX_CHUNK_SIZE
+        self._local = threading.local()
+        self._init_index()
+
+    # -------------------------
+    # Index
+    # -------------------------
+    def _index(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.root / "index.db", timeout=30, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_index(self) -> None:
+        conn = self._index()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " hash TEXT PRIMARY KEY, size INTEGER NOT NULL, refs INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS manifests ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL)"
+        )
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunk_dir / digest[:2] / digest
+
+    def _resolve(self, key: str) -> Path:
+        # Keys are manifest paths relative to the root; anything else,
+        # including a path that would leave the root, is not stored here
+        path = Path(key)
+        if path.is_absolute() or ".." in path.parts:
+            raise FileNotFoundError(key)
+        return self.root / path
+
+    # -------------------------
+    # Write
+    # -------------------------
+    def _store_chunk(self, conn: sqlite3.Connection, chunk: bytes) -> Tuple[str, int]:
+        digest = hashlib.sha256(chunk).hexdigest()
+
+        # Take the reference before writing: a concurrent delete only
+        # removes chunk files whose count is zero, under the same lock.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO chunks (hash, size, refs) VALUES (?, ?, 1) "
+                "ON CONFLICT(hash) DO UPDATE SET refs = refs + 1",
+                (digest, len(chunk)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        path = self._chunk_path(digest)
+        if not path.exists():
+            try:
+                path.parent.mkdir(exist_ok=True)
+                fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, prefix=".chunk-")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(chunk)
+                os.replace(tmp_name, path)
+            except BaseException:
+                self._release_chunks(conn, [digest])
+                raise
+
+        return digest, len(chunk)
+
+    def save_stream(
+        self,
+        filename: str,
+        stream: BinaryIO,
+        chunk_size: int | None = None,
+    ) -> StoredFile:
+        """
+        Chunk, deduplicate and store a binary stream.
+        Memory use is bounded by the read size plus one maximum-size chunk.
+        """
+        extension = self._validate_extension(filename)
+        read_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        conn = self._index()
+
+        digest = hashlib.sha256()
+        size = 0
+        chunks: List[Tuple[str, int]] = []
+        try:
+            for chunk in iter_chunks(
+                stream, self.min_chunk_size, self.max_chunk_size, read_size
+            ):
+                digest.update(chunk)
+                size += len(chunk)
+                chunks.append(self._store_chunk(conn, chunk))
+
+            name = uuid4().hex
+            key = f"manifests/{name[:2]}/{name}{extension}.json"
+            manifest_path = self.root / key
+            manifest_path.parent.mkdir(exist_ok=True)
+            manifest = {
+                "filename": filename,
+                "size": size,
+                "sha256": digest.hexdigest(),
+                "chunks": chunks,
+            }
+            fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, prefix=".manifest-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, manifest_path)
+            conn.execute(
+                "INSERT INTO manifests (path, size) VALUES (?, ?)",
+                (manifest_path.name, size),
+            )
+        except BaseException:
+            self._release_chunks(conn, [h for h, _ in chunks])
+            raise
+
+        return StoredFile(path=key, size=size, sha256=digest.hexdigest())
+
+    # -------------------------
+    # Read
+    # -------------------------
+    def _manifest(self, key: str) -> Dict:
+        with self._resolve(key).open() as f:
+            return json.load(f)
+
+    def open_range(self, key: str, offset: int = 0, length: int | None = None) -> BinaryIO:
+        """
+        Streaming reader that reassembles the file chunk by chunk.
+        Chunks wholly before `offset` are skipped without being opened.
+        """
+        chunks = self._manifest(key)["chunks"]
+        start = 0
+        while start < len(chunks) and offset >= chunks[start][1]:
+            offset -= chunks[start][1]
+            start += 1
+
+        reader = ChunkedReader(
+            [self._chunk_path(h) for h, _ in chunks[start:]], skip=offset
+        )
+        if length is not None:
+            reader = RangeReader(reader, length)
+        return io.BufferedReader(reader, buffer_size=settings.UPLOAD_CHUNK_SIZE)
+
+    @contextlib.contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """
+        Reassemble into a temporary file for consumers that need a real path
+        (e.g. the processor); removed on exit.
+        """
+        suffix = Path(key).suffixes[-2] if len(Path(key).suffixes) > 1 else ""
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, prefix=".restore-", suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as out, self.open(key) as src:
+                shutil.copyfileobj(src, out, settings.UPLOAD_CHUNK_SIZE)
+            yield tmp_name
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+
+    # -------------------------
+    # Delete
+    # -------------------------
+    def _release_chunks(self, conn: sqlite3.Connection, digests: List[str]) -> None:
+        if not digests:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for digest in digests:
+                conn.execute("UPDATE chunks SET refs = refs - 1 WHERE hash = ?", (digest,))
+            orphans = [
+                row[0]
+                for row in conn.execute("SELECT hash FROM chunks WHERE refs <= 0")
+            ]
+            conn.execute("DELETE FROM chunks WHERE refs <= 0")
+            for digest in orphans:
+                self._chunk_path(digest).unlink(missing_ok=True)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        """Remove a file, freeing chunks no other file references."""
+        try:
+            manifest = self._manifest(key)
+        except FileNotFoundError:
+            return
+        conn = self._index()
+        self._release_chunks(conn, [h for h, _ in manifest["chunks"]])
+        conn.execute("DELETE FROM manifests WHERE path = ?", (Path(key).name,))
+        self._resolve(key).unlink(missing_ok=True)
+
+    def stat(self, key: str) -> FileStat:
+        path = self._resolve(key)
+        row = self._index().execute(
+            "SELECT size FROM manifests WHERE path = ?", (path.name,)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(key)
+        return FileStat(size=row[0], modified_at=path.stat().st_mtime)
+
+    # -------------------------
+    # Stats
+    # -------------------------
+    def stats(self) -> Dict[str, object]:
+        conn = self._index()
+        logical, files = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM manifests"
+        ).fetchone()
+        physical, chunk_count = conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM chunks"
+        ).fetchone()
+        return {
+            "backend": self.name,
+            "files": files,
+            "chunks": chunk_count,
+            "logical_bytes": logical,
+            "physical_bytes": physical,
+            "dedup_ratio": round(logical / physical, 3) if physical else 1.0,
+        }
@@ -0,0 +1,108 @@
+#app/storage/object storage
+"""
+Filesystem-backed stand-in for an object store.
+
+Mirrors the semantics of S3-style buckets so the application can be
+exercised against them without a network service: flat opaque keys,
+whole-object atomic puts, ranged gets, head (stat) and delete. Each object
+is kept as a data file plus a small JSON sidecar holding its metadata,
+the way a bucket returns Content-Length and a checksum on HEAD.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+from uuid import uuid4
+
+from app.core.config import settings
+from app.storage.base import FileStat, RangeReader, StorageBackend, StoredFile
+
+
+class FilesystemObjectStorage(StorageBackend):
+    """
+    Object-store-like storage rooted at a local directory.
+    Decoupled from FastAPI and database layers.
+    """
+
+    name = "object"
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = Path(root or settings.OBJECT_STORAGE_DIR)
+        self.object_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+        for directory in (self.object_dir, self.tmp_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _object_path(self, key: str) -> Path:
+        # Keys are flat; the two-character prefix directory only keeps
+        # the stand-in's own directories small.
+        return self.object_dir / key[:2] / key
+
+    def _meta_path(self, key: str) -> Path:
+        return self._object_path(key).with_name(f"{key}.meta.json")
+
+    def save_stream(
+        self,
+        filename: str,
+        stream: BinaryIO,
+        chunk_size: int | None = None,
+    ) -> StoredFile:
+        """
+        Upload a stream as a single object.
+        The object only becomes visible once fully written (atomic put).
+        """
+        extension = self._validate_extension(filename)
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        key = f"{uuid4().hex}{extension}"
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp_dir, prefix=".put-", suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            path = self._object_path(key)
+            path.parent.mkdir(exist_ok=True)
+            self._meta_path(key).write_text(
+                json.dumps(
+                    {"filename": filename, "size": size, "sha256": digest.hexdigest()}
+                )
+            )
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            self._meta_path(key).unlink(missing_ok=True)
+            raise
+
+        return StoredFile(path=key, size=size, sha256=digest.hexdigest())
+
+    def open_range(self, key: str, offset: int = 0, length: int | None = None) -> BinaryIO:
+        f = self._object_path(key).open("rb")
+        if offset:
+            f.seek(offset)
+        if length is None:
+            return f
+        return RangeReader(f, length)
+
+    def delete(self, key: str) -> None:
+        self._object_path(key).unlink(missing_ok=True)
+        self._meta_path(key).unlink(missing_ok=True)
+
+    def stat(self, key: str) -> FileStat:
+        path = self._object_path(key)
+        if not path.exists():
+            raise FileNotFoundError(key)
+        meta = json.loads(self._meta_path(key).read_text())
+        return FileStat(size=meta["size"], modified_at=path.stat().st_mtime)
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrations import upgrade_schema
+from app.db.models import Document, User
+from app.db.session import PoolMetrics, build_async_engine, build_engine, to_async_url
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def engine(database_url):
+    engine = build_engine(database_url, PoolMetrics())
+    upgrade_schema(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def run_async(engine, database_url):
+    """Run `fn(async_session)` to completion on an async engine for the same database."""
+
+    def run(fn):
+        async def main():
+            async_engine = build_async_engine(to_async_url(database_url), PoolMetrics())
+            try:
+                factory = async_sessionmaker(async_engine, expire_on_commit=False)
+                async with factory() as session:
+                    return await fn(session)
+            finally:
+                await async_engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_document(db):
+    """Create documents for a user (created on first use)."""
+    users = {}
+
+    def make(email="owner@example.com", status="UPLOADED", size_bytes=1024):
+        if email not in users:
+            users[email] = User(email=email, hashed_password="x")
+            db.add(users[email])
+            db.commit()
+        document = Document(
+            user_id=users[email].id,
+            filename="doc.pdf",
+            file_path="/nonexistent/doc.pdf",
+            size_bytes=size_bytes,
+            status=status,
+        )
+        db.add(document)
+        db.commit()
+        return document
+
+    return make
@@ -0,0 +1,26 @@
+from passlib.context import CryptContext
+
+from app.auth.schemas import UserLogin
+from app.auth.service import authenticate_user
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.security import Principal
+from app.db.models import User
+
+
+def test_rehash_on_login_evicts_cached_principals(db, run_async, monkeypatch):
+    principals = TTLCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(security, "principal_cache", principals)
+    # A hash made with a cost other than BCRYPT_ROUNDS is upgraded on login
+    outdated = CryptContext(schemes=["bcrypt"]).hash("correct horse", rounds=4)
+    user = User(email="alice@example.com", hashed_password=outdated)
+    db.add(user)
+    db.commit()
+    principals.set("old-token", Principal(id=user.id, email=user.email), group=user.id)
+
+    login = UserLogin(email=user.email, password="correct horse")
+    run_async(lambda session: authenticate_user(session, login))
+
+    db.refresh(user)
+    assert user.hashed_password != outdated
+    assert principals.get("old-token") is None
@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from app.documents.batch import UploadPart, stage_batch
+from app.storage.file_storage import LocalFileStorage
+
+PDF = "application/pdf"
+
+
+class _FullDiskStorage(LocalFileStorage):
+    """Stores the first `room` files, then fails like a full disk."""
+
+    def __init__(self, root, room):
+        super().__init__(root)
+        self.room = room
+        self.saved = []
+
+    def save_stream(self, filename, stream, chunk_size=None):
+        if len(self.saved) == self.room:
+            raise OSError(28, "No space left on device")
+        stored = super().save_stream(filename, stream, chunk_size)
+        self.saved.append(stored.path)
+        return stored
+
+
+def _part(filename, content_type=PDF):
+    return UploadPart(filename, content_type, io.BytesIO(b"%PDF-1.4 " + filename.encode()))
+
+
+def test_per_item_errors_do_not_fail_the_batch(tmp_path):
+    storage = LocalFileStorage(tmp_path)
+    staged = stage_batch(storage, [_part("a.pdf"), _part("notes.txt", "text/plain"), _part("b.pdf")])
+
+    assert [item.stored is not None for item in staged] == [True, False, True]
+    assert staged[1].error == "Only PDF and DOCX files are allowed"
+
+
+def test_unexpected_error_removes_already_stored_items(tmp_path):
+    storage = _FullDiskStorage(tmp_path, room=2)
+
+    with pytest.raises(OSError):
+        stage_batch(storage, [_part("a.pdf"), _part("b.pdf"), _part("c.pdf")])
+
+    assert len(storage.saved) == 2
+    for path in storage.saved:
+        with pytest.raises(FileNotFoundError):
+            storage.stat(path)
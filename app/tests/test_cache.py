@@ -0,0 +1,77 @@
+from app.core import cache, security
+from app.core.cache import TTLCache
+from app.core.security import Principal, invalidate_user
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    principals = TTLCache(maxsize=10, ttl=300)
+
+    principals.set("token", "alice")
+    now[0] += 299
+    assert principals.get("token") == "alice"
+    now[0] += 1
+    assert principals.get("token") is None
+
+
+def test_ttl_is_capped_by_the_cache_default(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    principals = TTLCache(maxsize=10, ttl=60)
+
+    principals.set("token", "alice", ttl=3600)
+    now[0] += 60
+    assert principals.get("token") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    principals = TTLCache(maxsize=2, ttl=60)
+    principals.set("a", 1)
+    principals.set("b", 2)
+    principals.get("a")
+    principals.set("c", 3)
+    assert principals.get("b") is None
+    assert principals.get("a") == 1
+    assert principals.evictions == 1
+
+
+def test_zero_ttl_disables_caching():
+    principals = TTLCache(maxsize=10, ttl=0)
+    principals.set("token", "alice")
+    assert principals.get("token") is None
+
+
+def test_discard_group_drops_only_that_groups_entries():
+    principals = TTLCache(maxsize=10, ttl=60)
+    principals.set("a1", "alice", group=1)
+    principals.set("a2", "alice", group=1)
+    principals.set("b1", "bob", group=2)
+
+    assert principals.discard_group(1) == 2
+    assert principals.get("a1") is None
+    assert principals.get("a2") is None
+    assert principals.get("b1") == "bob"
+    assert principals.discard_group(1) == 0
+
+
+def test_evicted_entries_leave_their_group():
+    principals = TTLCache(maxsize=1, ttl=60)
+    principals.set("a1", "alice", group=1)
+    principals.set("b1", "bob", group=2)
+    assert principals.discard_group(1) == 0
+    assert principals.discard_group(2) == 1
+
+
+def test_invalidate_user_evicts_all_of_their_tokens(monkeypatch):
+    principals = TTLCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(security, "principal_cache", principals)
+    alice, bob = Principal(id=1, email="alice@example.com"), Principal(id=2, email="bob@example.com")
+    for token in ("alice-web", "alice-cli"):
+        principals.set(token, alice, group=alice.id)
+    principals.set("bob-web", bob, group=bob.id)
+
+    assert invalidate_user(alice.id) == 2
+    assert principals.get("alice-web") is None
+    assert principals.get("alice-cli") is None
+    assert principals.get("bob-web") == bob
@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from app.storage.dedup_storage import DedupFileStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return DedupFileStorage(tmp_path / "dedup")
+
+
+def test_round_trip_by_relative_key(storage):
+    stored = storage.save_stream("a.pdf", io.BytesIO(b"%PDF-1.4 hello"))
+    assert not stored.path.startswith("/")
+    with storage.open(stored.path) as f:
+        assert f.read() == b"%PDF-1.4 hello"
+    assert storage.stat(stored.path).size == stored.size
+
+
+@pytest.mark.parametrize("key", ["/etc/passwd", "../outside.json", "manifests/../../outside.json"])
+def test_keys_outside_the_root_are_not_found(storage, tmp_path, key):
+    outside = tmp_path / "outside.json"
+    outside.write_text('{"chunks": []}')
+
+    with pytest.raises(FileNotFoundError):
+        storage.open(key)
+    with pytest.raises(FileNotFoundError):
+        storage.stat(key)
+    storage.delete(key)
+    assert outside.exists()
@@ -0,0 +1,43 @@
+import pytest
+
+from app.documents.downloads import (
+    RangeNotSatisfiableError,
+    etag_matches,
+    parse_byte_range,
+)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 100)),
+        ("bytes=100-", (100, 1000)),
+        ("bytes=-100", (900, 1000)),
+        ("bytes=-5000", (0, 1000)),
+        ("bytes=990-5000", (990, 1000)),
+        ("Bytes = 0-0", (0, 1)),
+    ],
+)
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["items=0-1", "bytes=0-1,5-6", "bytes=", "bytes=-", "bytes=10", "bytes=a-b"],
+)
+def test_ignored_ranges_fall_back_to_the_full_body(header):
+    assert parse_byte_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=500-400", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_byte_range(header, 1000)
+
+
+def test_etag_matches_weakly():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.migrations import upgrade_schema
+
+
+def _old_schema(engine):
+    # documents and jobs as created before columns were added to them
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR, "
+            "hashed_password VARCHAR, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE documents (id INTEGER PRIMARY KEY, user_id INTEGER, "
+            "filename VARCHAR NOT NULL, file_path VARCHAR NOT NULL, status VARCHAR NOT NULL, "
+            "result TEXT, created_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY, kind VARCHAR NOT NULL, "
+            "document_id INTEGER NOT NULL, status VARCHAR NOT NULL, attempts INTEGER NOT NULL, "
+            "max_attempts INTEGER NOT NULL, run_at DATETIME NOT NULL, lease_owner VARCHAR, "
+            "lease_expires_at DATETIME, last_error TEXT, created_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO jobs (kind, document_id, status, attempts, max_attempts, run_at) "
+            "VALUES ('process_document', 1, 'QUEUED', 0, 5, '2024-01-01')"
+        ))
+
+
+def test_upgrade_adds_missing_columns_and_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    _old_schema(engine)
+
+    upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    documents = {c["name"] for c in inspector.get_columns("documents")}
+    assert {"size_bytes", "content_hash", "pages_done", "pages_total"} <= documents
+    jobs = {c["name"] for c in inspector.get_columns("jobs")}
+    assert {"user_id", "priority", "virtual_finish", "started_at", "queue_wait_seconds"} <= jobs
+    assert "ix_jobs_flow_finish" in {i["name"] for i in inspector.get_indexes("jobs")}
+    assert "upload_sessions" in inspector.get_table_names()
+
+    with engine.connect() as conn:
+        # Existing rows get the column default
+        assert conn.execute(text("SELECT priority FROM jobs")).scalar() == "normal"
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    upgrade_schema(engine)
+    upgrade_schema(engine)
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.db.migrations import upgrade_schema
+
+from app.documents.pagination import (
+    InvalidCursorError,
+    as_utc_naive,
+    decode_cursor,
+    encode_cursor,
+)
+from app.documents.service import _list_documents_stmt, _page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == [created_at.isoformat(), 42]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not base64 at all!", encode_cursor(1, 2, 3), "eyJhIjoxfQ", "////"],
+)
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 2)
+
+
+def test_as_utc_naive():
+    aware = datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    assert as_utc_naive(aware) == datetime(2024, 1, 1, 10)
+    assert as_utc_naive(datetime(2024, 1, 1)) == datetime(2024, 1, 1)
+    assert as_utc_naive(None) is None
+
+
+def _list(db, user_id, limit, cursor=None):
+    stmt = _list_documents_stmt(
+        user_id,
+        limit=limit,
+        cursor=cursor,
+        status=None,
+        created_after=None,
+        created_before=None,
+    )
+    return _page(db.execute(stmt).all(), limit)
+
+
+def test_keyset_pages_cover_every_document_once(db, make_document):
+    documents = [make_document() for _ in range(7)]
+    # Ties on created_at are broken by id
+    tied = datetime(2024, 1, 1)
+    for document in documents[2:5]:
+        document.created_at = tied
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = _list(db, documents[0].user_id, 3, cursor)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(document.id for document in documents)
+    assert len(seen) == len(set(seen))
+
+
+def test_keyset_pages_over_server_default_timestamps(engine, db, make_document):
+    # Rows written before created_at was set client-side carry the server
+    # default's "YYYY-MM-DD HH:MM:SS", which upgrade_schema pads so it
+    # compares correctly against the microsecond cursor values
+    user_id = make_document().user_id
+    with engine.begin() as conn:
+        for _ in range(5):
+            conn.execute(
+                text(
+                    "INSERT INTO documents (user_id, filename, file_path, status) "
+                    "VALUES (:user_id, 'old.pdf', '/nonexistent/old.pdf', 'UPLOADED')"
+                ),
+                {"user_id": user_id},
+            )
+        legacy = conn.execute(text("SELECT created_at FROM documents WHERE filename = 'old.pdf'"))
+        assert all(len(created_at) == 19 for (created_at,) in legacy)
+    upgrade_schema(engine)
+
+    seen, cursor = [], None
+    for _ in range(10):
+        rows, cursor = _list(db, user_id, 2, cursor)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+
+    assert cursor is None
+    assert len(seen) == len(set(seen)) == 6
+
+
+def test_cursor_with_wrong_types_is_rejected(db, make_document):
+    document = make_document()
+    with pytest.raises(InvalidCursorError):
+        _list(db, document.user_id, 3, encode_cursor("yesterday", 1))
+    with pytest.raises(InvalidCursorError):
+        _list(db, document.user_id, 3, encode_cursor(datetime(2024, 1, 1), "1"))
+
+
+def test_listing_is_scoped_to_the_user(db, make_document):
+    mine = make_document()
+    make_document(email="other@example.com")
+    rows, cursor = _list(db, mine.user_id, 10)
+    assert [row.id for row in rows] == [mine.id]
+    assert cursor is None
@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.documents import processor
+from app.documents.executor import ProcessingExecutor, ProcessingQueueFullError
+from app.documents.pipeline import ProcessingPipeline
+
+PAGES = 20
+
+
+@pytest.fixture
+def fake_processor(monkeypatch):
+    # Deterministic stages; the pool runs them in threads of this process
+    def split_document(file_path, filename):
+        time.sleep(0.005)
+        return {"page_count": PAGES}
+
+    def extract_page(file_path, filename, number, page_count):
+        time.sleep(0.005)
+        return {"number": number, "text": f"page {number}", "confidence": 0.95}
+
+    monkeypatch.setattr(processor, "split_document", split_document)
+    monkeypatch.setattr(processor, "extract_page", extract_page)
+
+
+@pytest.fixture
+def executor():
+    executor = ProcessingExecutor(max_workers=2, queue_size=1, pool=ThreadPoolExecutor(2))
+    yield executor
+    executor.shutdown()
+
+
+def _pipeline(executor):
+    return ProcessingPipeline(executor, on_split=lambda *_: None, on_pages=lambda *_: None)
+
+
+def test_pipeline_extracts_every_page(fake_processor, executor):
+    result, timings = _pipeline(executor).run("doc.pdf", "doc.pdf")
+    assert [page["number"] for page in result["pages"]] == list(range(1, PAGES + 1))
+    assert set(timings) == {"split_ms", "extract_ms", "merge_ms"}
+
+
+def test_pipeline_skips_pages_already_done(fake_processor, executor, monkeypatch):
+    extracted = []
+    extract_page = processor.extract_page
+    monkeypatch.setattr(
+        processor,
+        "extract_page",
+        lambda *args: extracted.append(args[2]) or extract_page(*args),
+    )
+    done = {n: {"number": n, "text": "kept", "confidence": 0.9} for n in range(1, 16)}
+
+    result, _ = _pipeline(executor).run("doc.pdf", "doc.pdf", done)
+
+    assert sorted(extracted) == list(range(16, PAGES + 1))
+    assert len(result["pages"]) == PAGES
+
+
+def test_concurrent_jobs_wait_for_pool_slots(fake_processor, executor):
+    # Other jobs' page fan-out keeps the pool saturated; a job starting
+    # meanwhile must wait for a slot rather than fail its split
+    jobs = 6
+    barrier = threading.Barrier(jobs)
+    results, errors = [], []
+
+    def run_job():
+        barrier.wait()
+        try:
+            results.append(_pipeline(executor).run("doc.pdf", "doc.pdf")[0])
+        except ProcessingQueueFullError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run_job) for _ in range(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == jobs
+    assert all(len(result["pages"]) == PAGES for result in results)
+    assert executor.stats()["rejected"] == 0
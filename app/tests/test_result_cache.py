@@ -0,0 +1,53 @@
+import json
+
+from app.core import metrics
+from app.db.models import ResultCacheEntry
+from app.documents.processor import PROCESSOR_VERSION
+from app.documents.result_cache import AsyncResultCache, ResultCache, result_cache_metrics
+
+RESULT = {"pages": [{"number": 1, "text": "hello", "confidence": 0.9}]}
+
+
+def _count(counter, **labels):
+    return sum(value for _, sample_labels, value in counter.samples() if sample_labels == labels)
+
+
+def test_api_lookups_are_the_reported_hit_rate(db, run_async):
+    db.add(ResultCacheEntry(content_hash="a" * 64, processor_version=PROCESSOR_VERSION, result=json.dumps(RESULT)))
+    db.commit()
+    hits, misses = result_cache_metrics.hits, result_cache_metrics.misses
+
+    async def lookup(session):
+        cache = AsyncResultCache(session)
+        return await cache.get("a" * 64), await cache.get("b" * 64)
+
+    assert run_async(lookup) == (RESULT, None)
+    assert (result_cache_metrics.hits, result_cache_metrics.misses) == (hits + 1, misses + 1)
+
+
+def test_worker_rechecks_are_counted_separately(db):
+    hits, misses = result_cache_metrics.hits, result_cache_metrics.misses
+    rechecked = _count(metrics.result_cache_rechecks, outcome="miss")
+
+    assert ResultCache(db).get("c" * 64) is None
+
+    assert _count(metrics.result_cache_rechecks, outcome="miss") == rechecked + 1
+    assert (result_cache_metrics.hits, result_cache_metrics.misses) == (hits, misses)
+
+
+def test_put_leaves_the_commit_to_the_caller(db, make_document):
+    document = make_document()
+    stored = _count(metrics.result_cache_stores)
+    cache = ResultCache(db)
+
+    # As in DocumentService._complete: put follows the completing update
+    document.status = "COMPLETED"
+    db.flush()
+    cache.put("d" * 64, RESULT)
+    # A concurrent insert of the same key is not an error
+    cache.put("d" * 64, RESULT)
+    assert _count(metrics.result_cache_stores) == stored + 1
+
+    db.rollback()
+    db.expunge_all()
+    assert db.get(ResultCacheEntry, ("d" * 64, PROCESSOR_VERSION)) is None
@@ -0,0 +1,48 @@
+import pytest
+
+from app.documents.results import (
+    DEFAULT_RESULT_FIELDS,
+    InvalidResultQueryError,
+    compress_page,
+    decompress_page,
+    parse_fields,
+    parse_page_range,
+)
+
+
+@pytest.mark.parametrize(
+    "pages, expected",
+    [
+        (None, (1, None)),
+        ("", (1, None)),
+        ("7", (7, 7)),
+        ("10-20", (10, 20)),
+        ("10-", (10, None)),
+        (" 3 - 4 ", (3, 4)),
+        ("5-5", (5, 5)),
+    ],
+)
+def test_parse_page_range(pages, expected):
+    assert parse_page_range(pages) == expected
+
+
+@pytest.mark.parametrize("pages", ["0", "0-3", "5-4", "-3", "a-b", "1-2-3", "1,2"])
+def test_invalid_page_ranges(pages):
+    with pytest.raises(InvalidResultQueryError):
+        parse_page_range(pages)
+
+
+def test_parse_fields():
+    assert parse_fields(None) == DEFAULT_RESULT_FIELDS
+    assert parse_fields("pages, language,pages") == ("pages", "language")
+    with pytest.raises(InvalidResultQueryError):
+        parse_fields("pages,secret")
+    with pytest.raises(InvalidResultQueryError):
+        parse_fields(" , ")
+
+
+def test_page_compression_round_trip():
+    page = {"number": 3, "text": "Grüße " * 200}
+    content = compress_page(page)
+    assert len(content) < len(page["text"])
+    assert decompress_page(content) == page
@@ -0,0 +1,136 @@
+import hashlib
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.base import utcnow
+from app.db.models import Document, UploadSession, User
+from app.documents import resumable
+from app.documents.resumable import (
+    ResumableUploadService,
+    UploadBusyError,
+    UploadOffsetMismatchError,
+    UploadSessionNotFoundError,
+    _StagingWriter,
+)
+from app.storage.file_storage import LocalFileStorage
+
+
+@pytest.fixture
+def upload_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_STAGING_DIR", tmp_path)
+    resumable._create_staging_file("abc")
+    yield "abc"
+    resumable._forget_digest("abc")
+
+
+def _append(upload_id, offset, data):
+    writer = _StagingWriter(upload_id, offset)
+    writer.write(data)
+    return writer.close()
+
+
+def test_chunks_append_at_the_staged_offset(upload_id):
+    assert _append(upload_id, 0, b"hello ") == 6
+    assert _append(upload_id, 6, b"world") == 11
+
+    with pytest.raises(UploadOffsetMismatchError) as exc_info:
+        _StagingWriter(upload_id, 6)
+    assert exc_info.value.offset == 11
+
+
+def test_a_session_has_one_writer_at_a_time(upload_id):
+    writer = _StagingWriter(upload_id, 0)
+    try:
+        with pytest.raises(UploadBusyError):
+            _StagingWriter(upload_id, 0)
+    finally:
+        writer.release()
+    # A rejected writer must not keep the lock either
+    with pytest.raises(UploadOffsetMismatchError):
+        _StagingWriter(upload_id, 5)
+    _StagingWriter(upload_id, 0).release()
+
+
+def test_digest_survives_a_lost_cache(upload_id):
+    _append(upload_id, 0, b"hello ")
+    # As in another process, or after a restart
+    resumable._forget_digest(upload_id)
+    _append(upload_id, 6, b"world")
+
+    writer = _StagingWriter(upload_id, None)
+    try:
+        assert writer.sha256() == hashlib.sha256(b"hello world").hexdigest()
+    finally:
+        writer.release()
+
+
+def test_missing_staging_file(upload_id):
+    with pytest.raises(UploadSessionNotFoundError):
+        _StagingWriter("missing", 0)
+
+
+# -------------------------
+# Completion
+# -------------------------
+@pytest.fixture
+def session_row(db, upload_id):
+    user = User(email="owner@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    session = UploadSession(
+        id=upload_id,
+        user_id=user.id,
+        filename="report.pdf",
+        size=11,
+        expires_at=utcnow() + timedelta(hours=1),
+    )
+    db.add(session)
+    db.commit()
+    _append(upload_id, 0, b"hello world")
+    return session
+
+
+def _complete(run_async, storage, session, fail_commit=False):
+    async def complete(db):
+        if fail_commit:
+            async def commit():
+                raise RuntimeError("database went away")
+
+            db.commit = commit
+        return await ResumableUploadService(db, storage).complete(session.id, session.user_id)
+
+    return run_async(complete)
+
+
+def test_complete_records_the_document_and_removes_staging(db, run_async, tmp_path, session_row):
+    storage = LocalFileStorage(tmp_path / "store")
+
+    document = _complete(run_async, storage, session_row)
+
+    assert db.scalar(select(func.count()).select_from(UploadSession)) == 0
+    with storage.open(document.file_path) as f:
+        assert f.read() == b"hello world"
+    assert not resumable.staging_path(session_row.id).exists()
+    # A writer arriving late must not append to the stored file
+    with pytest.raises(UploadSessionNotFoundError):
+        _StagingWriter(session_row.id, 11)
+
+
+def test_failed_commit_leaves_the_upload_completable(db, run_async, tmp_path, session_row):
+    storage = LocalFileStorage(tmp_path / "store")
+
+    with pytest.raises(RuntimeError):
+        _complete(run_async, storage, session_row, fail_commit=True)
+
+    # Nothing was stored, and the session can still be finished
+    assert db.scalar(select(func.count()).select_from(Document)) == 0
+    assert db.scalar(select(func.count()).select_from(UploadSession)) == 1
+    assert not [p for p in storage.root.rglob("*.pdf")]
+    assert resumable.staging_path(session_row.id).read_bytes() == b"hello world"
+
+    document = _complete(run_async, storage, session_row)
+    with storage.open(document.file_path) as f:
+        assert f.read() == b"hello world"
@@ -0,0 +1,144 @@
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from app.jobs import scheduler
+from app.jobs.queue import AsyncJobQueue, JobQueue, QueueFullError
+from app.jobs.scheduler import UnknownPriorityError, finish_tags, job_cost
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def scheduler_settings(monkeypatch):
+    monkeypatch.setattr(
+        settings, "SCHEDULER_PRIORITY_WEIGHTS", {"interactive": 8.0, "normal": 2.0, "batch": 1.0}
+    )
+    monkeypatch.setattr(settings, "SCHEDULER_COST_BYTES", MB)
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_RUNNING_PER_USER", 0)
+
+
+# -------------------------
+# Finish tags
+# -------------------------
+def test_job_cost_grows_with_size():
+    assert job_cost(None) == 1.0
+    assert job_cost(0) == 1.0
+    assert job_cost(3 * MB) == 4.0
+
+
+def test_a_new_flow_starts_at_virtual_time():
+    assert finish_tags(10.0, None, "batch", [0]) == [(10.0, 11.0)]
+    # A flow that went idle does not keep credit from the past
+    assert finish_tags(10.0, 4.0, "batch", [0]) == [(10.0, 11.0)]
+
+
+def test_tags_chain_within_a_flow_and_scale_with_weight():
+    assert finish_tags(0.0, 5.0, "batch", [0, MB]) == [(5.0, 6.0), (6.0, 8.0)]
+    assert finish_tags(0.0, None, "normal", [0, 0]) == [(0.0, 0.5), (0.5, 1.0)]
+    assert finish_tags(0.0, None, "interactive", [0]) == [(0.0, 0.125)]
+
+
+def test_unknown_priority():
+    with pytest.raises(UnknownPriorityError):
+        finish_tags(0.0, None, "urgent", [0])
+    with pytest.raises(UnknownPriorityError):
+        scheduler.weight_for("urgent")
+
+
+# -------------------------
+# Claim order
+# -------------------------
+def _enqueue(run_async, documents, priority):
+    async def enqueue(session):
+        await AsyncJobQueue(session).enqueue_many(documents, priority=priority)
+        await session.commit()
+
+    run_async(enqueue)
+
+
+def _claim_owners(db, count):
+    queue = JobQueue(db)
+    return [queue.claim("worker").user_id for _ in range(count)]
+
+
+def test_bulk_backlog_does_not_delay_another_users_job(db, run_async, make_document):
+    bulk = [make_document("bulk@example.com") for _ in range(20)]
+    _enqueue(run_async, bulk, "batch")
+    bulk_user = bulk[0].user_id
+    assert _claim_owners(db, 3) == [bulk_user] * 3
+
+    other = make_document("other@example.com")
+    _enqueue(run_async, [other], "interactive")
+    assert _claim_owners(db, 1) == [other.user_id]
+
+
+def test_backlogged_flows_share_by_weight(db, run_async, make_document):
+    batch = [make_document("batch@example.com") for _ in range(10)]
+    normal = [make_document("normal@example.com") for _ in range(10)]
+    _enqueue(run_async, batch, "batch")
+    _enqueue(run_async, normal, "normal")
+
+    owners = _claim_owners(db, 9)
+    assert owners.count(normal[0].user_id) == 6
+    assert owners.count(batch[0].user_id) == 3
+
+
+def test_running_cap_per_user(db, run_async, make_document, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_RUNNING_PER_USER", 1)
+    mine = [make_document("mine@example.com") for _ in range(3)]
+    _enqueue(run_async, mine, "interactive")
+    other = make_document("other@example.com")
+    _enqueue(run_async, [other], "batch")
+
+    assert _claim_owners(db, 2) == [mine[0].user_id, other.user_id]
+    # Both users are at their cap
+    assert JobQueue(db).claim("worker") is None
+
+
+def test_enqueue_rejects_a_full_queue(run_async, make_document, monkeypatch):
+    monkeypatch.setattr(settings, "PROCESSING_QUEUE_MAX", 1)
+    first, second = make_document(), make_document()
+
+    async def enqueue(session):
+        queue = AsyncJobQueue(session)
+        await queue.enqueue(first)
+        # An active job is reused rather than counted again
+        await queue.enqueue(first)
+        with pytest.raises(QueueFullError):
+            await queue.enqueue(second)
+
+    run_async(enqueue)
+
+
+# -------------------------
+# Queue waits
+# -------------------------
+def _observed_waits(priority):
+    for name, labels, value in metrics.job_queue_wait.samples():
+        if name == "job_queue_wait_seconds_count" and labels == {"priority": priority}:
+            return value
+    return 0
+
+
+def test_waits_are_tracked_per_user(db, run_async, make_document):
+    observed = _observed_waits("batch")
+    documents = [make_document("a@example.com"), make_document("b@example.com")]
+    _enqueue(run_async, documents[:1], "batch")
+    _enqueue(run_async, documents[1:], "batch")
+    job = JobQueue(db).claim("worker")
+    assert job.queue_wait_seconds is not None
+    assert _observed_waits("batch") == observed + 1
+
+    stats = run_async(lambda session: AsyncJobQueue(session).stats())
+
+    assert stats["queued"] == 1
+    assert stats["queued_by_priority"]["batch"] == 1
+    users = {user["user_id"]: user for user in stats["users"]}
+    assert users[job.user_id]["started"] == 1
+    assert users[job.user_id]["queued"] == 0
+    assert users[job.user_id]["max_wait_seconds"] is not None
+    waiting = next(uid for uid in users if uid != job.user_id)
+    assert users[waiting]["queued"] == 1
+    assert users[waiting]["started"] == 0
+    assert users[waiting]["oldest_queued_wait_seconds"] >= 0
@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db.migrations import upgrade_schema
+from app.db.models import Document, DocumentResult, DocumentResultPage, User
+from app.db.session import PoolMetrics, build_engine
+from app.documents import results, search
+from app.documents.results import compress_page
+from app.documents.search import InvalidSearchQueryError, build_match_query
+
+pytestmark = pytest.mark.skipif(not search.search_enabled(), reason="needs SQLite")
+
+
+@pytest.mark.parametrize(
+    "q, expected",
+    [
+        ("invoice", 'owner : "u7" AND content : ("invoice")'),
+        ("invoice total", 'owner : "u7" AND content : ("invoice" "total")'),
+        ('"net total" acme*', 'owner : "u7" AND content : ("net total" "acme"*)'),
+        # FTS5 syntax typed by the user is matched as plain words
+        ("a OR b NEAR(", 'owner : "u7" AND content : ("a" "OR" "b" "NEAR(")'),
+        ('say "hi', 'owner : "u7" AND content : ("say" """hi")'),
+    ],
+)
+def test_build_match_query(q, expected):
+    assert build_match_query(q, 7) == expected
+
+
+@pytest.mark.parametrize("q", ["", "   ", '""', "*"])
+def test_queries_without_terms_are_rejected(q):
+    with pytest.raises(InvalidSearchQueryError):
+        build_match_query(q, 7)
+
+
+def _race_startup(url, processes):
+    """ensure_search_index from several engines at once, as processes would."""
+    engines = [build_engine(url, PoolMetrics()) for _ in range(processes)]
+    barrier = threading.Barrier(processes)
+    errors = []
+
+    def start(process_engine):
+        barrier.wait()
+        try:
+            search.ensure_search_index(process_engine)
+        except OperationalError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=start, args=(e,)) for e in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for process_engine in engines:
+        process_engine.dispose()
+    return errors
+
+
+def _store_results(engine, texts):
+    """Completed documents with results stored before the index existed."""
+    with Session(engine) as db:
+        user = db.query(User).filter_by(email="owner@example.com").one_or_none()
+        if user is None:
+            user = User(email="owner@example.com", hashed_password="x")
+            db.add(user)
+            db.flush()
+        ids = []
+        for content in texts:
+            document = Document(user_id=user.id, filename="a.pdf", file_path="a.pdf", status="COMPLETED")
+            db.add(document)
+            db.flush()
+            page = {"number": 1, "text": content, "confidence": 0.9}
+            db.add(DocumentResult(document_id=document.id, processor_version="test", page_count=1))
+            db.add(DocumentResultPage(document_id=document.id, page_number=1, content=compress_page(page)))
+            ids.append(document.id)
+        db.commit()
+    return ids
+
+
+def _indexed(engine):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT rowid FROM {search.SEARCH_TABLE} ORDER BY rowid")).scalars().all()
+
+
+def test_concurrent_startup_keeps_search_enabled(tmp_path):
+    for attempt in range(8):
+        url = f"sqlite:///{tmp_path / f'race-{attempt}.db'}"
+        engine = build_engine(url, PoolMetrics())
+        upgrade_schema(engine)
+        document_ids = _store_results(engine, ["quarterly invoice"])
+
+        assert _race_startup(url, 4) == []
+        assert search.search_enabled()
+        assert _indexed(engine) == document_ids
+        engine.dispose()
+
+
+def test_interrupted_backfill_resumes(engine, monkeypatch):
+    document_ids = _store_results(engine, ["first", "second", "third"])
+    monkeypatch.setattr(search, "BACKFILL_BATCH", 1)
+
+    # Crash while indexing the second batch
+    calls = []
+    decompress_page = results.decompress_page
+
+    def crash_on_second_batch(content):
+        calls.append(content)
+        if len(calls) == 2:
+            raise RuntimeError("worker killed")
+        return decompress_page(content)
+
+    monkeypatch.setattr(results, "decompress_page", crash_on_second_batch)
+    with pytest.raises(RuntimeError):
+        search.ensure_search_index(engine)
+    assert _indexed(engine) == document_ids[:1]
+
+    # The table exists now, but the next startup still finishes the job
+    monkeypatch.setattr(results, "decompress_page", decompress_page)
+    search.ensure_search_index(engine)
+    assert _indexed(engine) == document_ids
+    with engine.connect() as conn:
+        state = conn.execute(text("SELECT backfilled_through, completed_at FROM search_index_state")).one()
+    assert state.backfilled_through == document_ids[-1]
+    assert state.completed_at is not None
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from app.documents import states
+from app.documents.service import DocumentService
+
+
+def test_can_transition_follows_the_state_machine():
+    assert states.can_transition(states.UPLOADED, states.PROCESSING)
+    assert states.can_transition(states.PROCESSING, states.COMPLETED)
+    assert states.can_transition(states.PROCESSING, states.FAILED)
+    assert states.can_transition(states.FAILED, states.PROCESSING)
+
+    assert not states.can_transition(states.UPLOADED, states.COMPLETED)
+    assert not states.can_transition(states.COMPLETED, states.PROCESSING)
+    assert not states.can_transition(states.PROCESSING, states.PROCESSING)
+    assert not states.can_transition("UNKNOWN", states.PROCESSING)
+
+
+def test_sources_for():
+    assert states.sources_for(states.PROCESSING) == (states.FAILED, states.UPLOADED)
+    assert states.sources_for(states.COMPLETED) == (states.PROCESSING,)
+    assert states.sources_for(states.UPLOADED) == ()
+
+
+def test_validate_transition_rejects_any_disallowed_source():
+    states.validate_transition((states.UPLOADED, states.FAILED), states.PROCESSING)
+    with pytest.raises(states.InvalidTransitionError):
+        states.validate_transition((states.UPLOADED, states.COMPLETED), states.PROCESSING)
+
+
+def test_transition_is_rejected_from_a_wrong_status(db, make_document):
+    document = make_document(status=states.COMPLETED)
+    service = DocumentService(db)
+
+    assert not service.transition(document.id, states.PROCESSING)
+    with pytest.raises(states.InvalidTransitionError):
+        service.transition(document.id, states.COMPLETED, from_statuses=(states.UPLOADED,))
+
+
+def test_lost_claim_race_is_rejected(session_factory, make_document):
+    document = make_document()
+    contenders = 8
+    barrier = threading.Barrier(contenders)
+    results = []
+
+    def claim():
+        db = session_factory()
+        try:
+            barrier.wait()
+            results.append(DocumentService(db).transition(document.id, states.PROCESSING))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=claim) for _ in range(contenders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False] * (contenders - 1) + [True]
+    db = session_factory()
+    assert DocumentService(db).get_document(document.id, None).status == states.PROCESSING
+    db.close()